@@ -0,0 +1,163 @@
+"""Walk-forward (rolling-origin) evaluation of the ARIMA forecast model.
+
+For every origin ``t`` the model sees ``close[:t]`` and forecasts the next
+``horizon`` closes, which are compared against what actually happened.
+
+Origins are split into contiguous chunks that run in parallel worker
+processes. Inside a chunk the state-space results are carried forward with
+``results.extend`` (Kalman filter over the new observations only), and the
+parameters are re-estimated every ``refit_every`` origins, warm-started from
+the previous fit. That turns hundreds of full refits into a handful.
+"""
+
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+from app.forecast_models import ARIMA_ORDER
+from app.bar_cache import get_bars
+
+MIN_TRAIN = 60
+BACKTEST_MAX_ORIGINS = int(os.getenv("BACKTEST_MAX_ORIGINS", "500"))
+BACKTEST_MAX_HORIZON = 30
+BACKTEST_REFIT_EVERY = int(os.getenv("BACKTEST_REFIT_EVERY", "20"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # One long-lived pool: workers pay the statsmodels import once. Spawned
+    # (not forked) so workers never inherit the server's threads or locks.
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=BACKTEST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _fit(train: np.ndarray, start_params=None):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    return ARIMA(train, order=ARIMA_ORDER).fit(start_params=start_params)
+
+
+def backtest_chunk(
+    close: np.ndarray, origins: list[int], horizon: int, refit_every: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Evaluate consecutive ``origins``; returns (predicted, lower, upper),
+    each shaped ``(len(origins), horizon)``."""
+    predicted = np.empty((len(origins), horizon))
+    lower = np.empty_like(predicted)
+    upper = np.empty_like(predicted)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = None
+        position = 0
+        for i, origin in enumerate(origins):
+            if results is None or i % refit_every == 0:
+                start_params = results.params if results is not None else None
+                results = _fit(close[:origin], start_params)
+            elif origin > position:
+                results = results.extend(close[position:origin])
+            position = origin
+
+            forecast = results.get_forecast(steps=horizon)
+            predicted[i] = forecast.predicted_mean
+            interval = forecast.conf_int(alpha=0.05)
+            lower[i] = interval[:, 0]
+            upper[i] = interval[:, 1]
+    return predicted, lower, upper
+
+
+def _chunks(origins: list[int], count: int) -> list[list[int]]:
+    size = -(-len(origins) // count)
+    return [origins[i:i + size] for i in range(0, len(origins), size)]
+
+
+def run_backtest(
+    close: np.ndarray,
+    origins: int = 250,
+    horizon: int = 7,
+    refit_every: int | None = None,
+    workers: int | None = None,
+) -> dict | None:
+    """Walk-forward over the last ``origins`` start points of ``close``.
+
+    Returns per-step MAE, MAPE (%) and 95% interval coverage, or ``None``
+    when the series is too short.
+    """
+    refit_every = refit_every or BACKTEST_REFIT_EVERY
+    workers = workers or BACKTEST_WORKERS
+    close = np.asarray(close, dtype=float)
+    last_origin = len(close) - horizon
+    first_origin = max(MIN_TRAIN, last_origin - origins + 1)
+    if last_origin < first_origin:
+        return None
+    origin_list = list(range(first_origin, last_origin + 1))
+
+    started = time.perf_counter()
+    chunks = _chunks(origin_list, max(1, min(workers, len(origin_list))))
+    if len(chunks) == 1:
+        parts = [backtest_chunk(close, chunks[0], horizon, refit_every)]
+    else:
+        pool = _get_pool()
+        futures = [pool.submit(backtest_chunk, close, c, horizon, refit_every) for c in chunks]
+        parts = [f.result() for f in futures]
+    predicted, lower, upper = (np.concatenate(arrays) for arrays in zip(*parts))
+
+    # actual[i, k] is the close k+1 steps after origin i
+    steps = np.arange(horizon)
+    actual = close[np.array(origin_list)[:, None] + steps]
+    abs_err = np.abs(predicted - actual)
+    pct_err = abs_err / np.abs(actual) * 100
+    covered = (actual >= lower) & (actual <= upper)
+
+    return {
+        "origins": len(origin_list),
+        "horizon": horizon,
+        "refitEvery": refit_every,
+        "workers": len(chunks),
+        "metrics": [
+            {
+                "step": int(k + 1),
+                "mae": round(float(abs_err[:, k].mean()), 4),
+                "mape": round(float(pct_err[:, k].mean()), 4),
+                "coverage": round(float(covered[:, k].mean()), 4),
+            }
+            for k in steps
+        ],
+        "overall": {
+            "mae": round(float(abs_err.mean()), 4),
+            "mape": round(float(pct_err.mean()), 4),
+            "coverage": round(float(covered.mean()), 4),
+        },
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def fetch_backtest(ticker: str, period: str = "2y", origins: int = 250, horizon: int = 7) -> dict:
+    data = get_bars(ticker, period, "1d")
+    result = None
+    if not data.empty:
+        result = run_backtest(data["Close"].dropna().to_numpy(), origins, horizon)
+    return {
+        "ticker": ticker.upper(),
+        "model": "ARIMA",
+        "order": list(ARIMA_ORDER),
+        "backtest": result,
+    }
@@ -0,0 +1,136 @@
+"""Serve bar requests from the finest series already fetched for a ticker.
+
+For every ticker we remember which (interval, period) series have been
+downloaded. A request for a shorter period is answered by slicing, and a
+coarser interval by OHLCV resampling, from a held series instead of a new
+upstream download. Only requests needing finer or older data than anything
+held go to the provider.
+
+The held series themselves are re-read through the provider on every call,
+so freshness, stale-while-revalidate and rate limiting stay with the guard
+layer (providers.guarded); this module only decides which series to ask for.
+Period windows are sliced as views on the held ``PriceSeries`` arrays.
+"""
+
+import threading
+
+import pandas as pd
+
+from app.providers import get_provider
+from app.providers.series import PriceSeries
+
+# Approximate calendar days per period, to decide which periods contain others
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "ytd": 366,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "max": float("inf"),
+}
+
+# pandas resample rule per derivable interval. Weekly/monthly bins are
+# labelled by their first day, matching Yahoo's own weekly/monthly bars.
+RESAMPLE_RULES = {
+    "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "1wk": "W-MON", "1mo": "MS", "3mo": "QS",
+}
+INTRADAY_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30}
+DAILY_RANK = {"1d": 0, "1wk": 1, "1mo": 2, "3mo": 3}
+# Daily-or-coarser sources whose bins nest exactly in each target's bins.
+# Weeks straddle month boundaries, so weekly bars never build months.
+EXACT_SOURCES = {"1wk": {"1d"}, "1mo": {"1d"}, "3mo": {"1d", "1mo"}}
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+_held: dict[str, dict[str, str]] = {}
+_lock = threading.Lock()
+
+
+def can_derive(source: str, target: str) -> bool:
+    """True when ``target`` bars can be built exactly from ``source`` bars."""
+    if source == target:
+        return True
+    if target not in RESAMPLE_RULES:
+        return False
+    if source in DAILY_RANK and target in DAILY_RANK:
+        return source in EXACT_SOURCES[target]
+    if source in INTRADAY_MINUTES and target in INTRADAY_MINUTES:
+        return INTRADAY_MINUTES[target] % INTRADAY_MINUTES[source] == 0
+    return False
+
+
+def covers(held_period: str, period: str) -> bool:
+    # "ytd" can be anything from days to a year long, so it only covers itself
+    if held_period == "ytd":
+        return period == "ytd"
+    if held_period not in PERIOD_DAYS or period not in PERIOD_DAYS:
+        return held_period == period
+    return PERIOD_DAYS[held_period] >= PERIOD_DAYS[period]
+
+
+def resample_bars(data: pd.DataFrame, interval: str) -> pd.DataFrame:
+    if data.empty:
+        return data
+    rule = RESAMPLE_RULES[interval]
+    if interval in INTRADAY_MINUTES:
+        resampled = data.resample(rule, label="left", closed="left", origin="start_day")
+    else:
+        resampled = data.resample(rule, label="left", closed="left")
+    columns = {c: f for c, f in OHLCV_AGG.items() if c in data.columns}
+    # Empty bins (weekends, holidays, overnight) come back as NaN rows
+    bars = resampled.agg(columns).dropna(subset=["Open"])
+    bars.index.name = "Date"
+    return bars
+
+
+def _source_for(ticker: str, period: str, interval: str) -> tuple[str, str] | None:
+    """Pick the held (interval, period) to derive from: the finest usable
+    interval, so a derived bar never depends on how a coarser series was
+    binned."""
+    with _lock:
+        held = dict(_held.get(ticker, {}))
+    usable = [
+        (source, held_period)
+        for source, held_period in held.items()
+        if can_derive(source, interval) and covers(held_period, period)
+    ]
+    if not usable:
+        return None
+    return min(usable, key=lambda item: (DAILY_RANK.get(item[0], -1), INTRADAY_MINUTES.get(item[0], 0)))
+
+
+def _remember(ticker: str, period: str, interval: str):
+    with _lock:
+        held = _held.setdefault(ticker, {})
+        if interval not in held or covers(period, held[interval]):
+            held[interval] = period
+
+
+def forget(ticker: str | None = None):
+    with _lock:
+        if ticker is None:
+            _held.clear()
+        else:
+            _held.pop(ticker.upper(), None)
+
+
+def get_series(ticker: str, period: str = "1y", interval: str = "1d") -> PriceSeries:
+    """Bars for ``(period, interval)``, derived from a held series when possible."""
+    symbol = ticker.upper()
+    provider = get_provider()
+    source = _source_for(symbol, period, interval)
+    if source is not None:
+        source_interval, source_period = source
+        series = provider.series(ticker, source_period, source_interval)
+        if not series.empty:
+            if source_period != period:
+                series = series.slice_period(period)
+            if source_interval != interval:
+                series = PriceSeries.from_frame(resample_bars(series.to_frame(), interval))
+            return series
+
+    series = provider.series(ticker, period, interval)
+    if not series.empty:
+        _remember(symbol, period, interval)
+    return series
+
+
+def get_bars(ticker: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+    return get_series(ticker, period, interval).to_frame()
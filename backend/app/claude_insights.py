@@ -2,13 +2,24 @@ import json
 import os
 import time
 import logging
+import threading
 
-import anthropic
+from app import metrics, shared_store
+from app.resilience import note_stale, time_left
 
 logger = logging.getLogger(__name__)
 
-_cache: dict[str, tuple[float, dict]] = {}
-CACHE_TTL = 3600  # 1 hour
+# ticker -> (stored at, insights, seconds they stay fresh)
+_cache: dict[str, tuple[float, dict, float]] = {}
+CACHE_TTL = int(os.getenv("INSIGHTS_CACHE_TTL", "3600"))
+# Insights written by the bulk job (insights_batch) are meant to last until
+# the next scheduled run, not just an hour
+INSIGHTS_BULK_TTL = int(os.getenv("INSIGHTS_BULK_TTL", "86400"))
+# Below this much time left before the request deadline, don't start a call
+MIN_CALL_SECONDS = float(os.getenv("INSIGHTS_MIN_CALL_SECONDS", "1"))
+
+_clients: dict[str, object] = {}
+_clients_lock = threading.Lock()
 
 RATED_METRICS = [
     "trailingPE",
@@ -24,6 +35,51 @@ RATED_METRICS = [
 ]
 
 
+MODEL = "claude-sonnet-4-5-20250929"
+MAX_TOKENS = 1500
+
+# Instructions shared by every evaluation; the user message carries only the
+# company and its metrics, so bulk requests can group several companies
+SYSTEM_PROMPT = """You are a senior financial analyst. Evaluate a company's financial ratios **relative to its sector and industry norms**.
+
+For each metric, provide:
+- "score": integer 1-10 (10 = excellent for an investor)
+- "label": one of "Excellent", "Good", "Fair", "Poor", "Bad"
+- "color": one of "green", "yellow-green", "yellow", "orange", "red"
+- "explanation": one sentence explaining why this score, mentioning sector context
+
+Scoring direction:
+- trailingPE, forwardPE, pegRatio, priceToBook, debtToEquity: LOWER is better (higher score for lower values relative to sector)
+- beta: closer to 1.0 is generally better; very high or very low gets lower score
+- profitMargins, revenueGrowth, returnOnEquity, returnOnAssets: HIGHER is better (higher score for higher values relative to sector)
+
+If a metric is N/A, set score to null, label to "N/A", color to "gray", and explanation to "Data not available."
+
+Also provide:
+- "overallScore": integer 1-100 representing overall financial health
+- "overallLabel": one of "Strong", "Above Average", "Average", "Below Average", "Weak"
+- "overallSummary": 1-2 sentences summarizing the stock's financial position relative to its sector
+
+Return ONLY valid JSON with this exact structure (no markdown, no extra text):
+{
+  "metrics": {
+    "trailingPE": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "forwardPE": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "pegRatio": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "priceToBook": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "debtToEquity": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "beta": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "profitMargins": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "revenueGrowth": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "returnOnEquity": {"score": ..., "label": "...", "color": "...", "explanation": "..."},
+    "returnOnAssets": {"score": ..., "label": "...", "color": "...", "explanation": "..."}
+  },
+  "overallScore": ...,
+  "overallLabel": "...",
+  "overallSummary": "..."
+}"""
+
+
 def _build_prompt(stock_data: dict) -> str:
     profile = stock_data.get("profile", {})
     ratios = stock_data.get("ratios", {})
@@ -50,47 +106,10 @@ def _build_prompt(stock_data: dict) -> str:
         f"  {k}: {v if v is not None else 'N/A'}" for k, v in raw_values.items()
     )
 
-    return f"""You are a senior financial analyst. Evaluate the following financial ratios for {company} ({sector} / {industry}) **relative to its sector and industry norms**.
+    return f"""Evaluate the following financial ratios for {company} ({sector} / {industry}).
 
 Raw metrics:
-{values_str}
-
-For each metric, provide:
-- "score": integer 1-10 (10 = excellent for an investor)
-- "label": one of "Excellent", "Good", "Fair", "Poor", "Bad"
-- "color": one of "green", "yellow-green", "yellow", "orange", "red"
-- "explanation": one sentence explaining why this score, mentioning sector context
-
-Scoring direction:
-- trailingPE, forwardPE, pegRatio, priceToBook, debtToEquity: LOWER is better (higher score for lower values relative to sector)
-- beta: closer to 1.0 is generally better; very high or very low gets lower score
-- profitMargins, revenueGrowth, returnOnEquity, returnOnAssets: HIGHER is better (higher score for higher values relative to sector)
-
-If a metric is N/A, set score to null, label to "N/A", color to "gray", and explanation to "Data not available."
-
-Also provide:
-- "overallScore": integer 1-100 representing overall financial health
-- "overallLabel": one of "Strong", "Above Average", "Average", "Below Average", "Weak"
-- "overallSummary": 1-2 sentences summarizing the stock's financial position relative to its sector
-
-Return ONLY valid JSON with this exact structure (no markdown, no extra text):
-{{
-  "metrics": {{
-    "trailingPE": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "forwardPE": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "pegRatio": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "priceToBook": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "debtToEquity": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "beta": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "profitMargins": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "revenueGrowth": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "returnOnEquity": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}},
-    "returnOnAssets": {{"score": ..., "label": "...", "color": "...", "explanation": "..."}}
-  }},
-  "overallScore": ...,
-  "overallLabel": "...",
-  "overallSummary": "..."
-}}"""
+{values_str}"""
 
 
 def _parse_response(text: str) -> dict | None:
@@ -123,36 +142,125 @@ def _parse_response(text: str) -> dict | None:
     return data
 
 
-def get_insights(stock_data: dict, ticker: str) -> dict | None:
+def api_key() -> str | None:
     api_key = os.getenv("CLAUDE_API_KEY")
     if not api_key or api_key == "your-claude-api-key-here":
+        return None
+    return api_key
+
+
+def get_client(api_key: str):
+    """Return a shared Anthropic client, importing the SDK on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            import anthropic
+
+            client = anthropic.Anthropic(api_key=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def _is_expired(entry: tuple[float, dict, float], lead: float = 0.0) -> bool:
+    stored_at, _, ttl = entry
+    return time.time() - stored_at >= ttl - lead
+
+
+def expiring(tickers: set[str], lead: float) -> list[str]:
+    """Cached tickers whose insights expire within ``lead`` seconds."""
+    return [t for t, entry in list(_cache.items()) if t in tickers and _is_expired(entry, lead)]
+
+
+def _cached(cache_key: str) -> tuple[float, dict, float] | None:
+    """The local cache entry, or a newer one another worker process stored
+    in the shared store."""
+    entry = _cache.get(cache_key)
+    if shared_store.enabled() and (entry is None or _is_expired(entry)):
+        shared = shared_store.get(f"insights:{cache_key}")
+        if shared is not None and (entry is None or shared[0] > entry[0]):
+            payload = json.loads(shared[1])
+            entry = (shared[0], payload["insights"], payload["ttl"])
+            _cache[cache_key] = entry
+    return entry
+
+
+def store(ticker: str, insights: dict, ttl: float = CACHE_TTL):
+    """Cache ``insights`` for ``ttl`` seconds, for this and (with the shared
+    store) every other worker process."""
+    cache_key = ticker.upper()
+    now = time.time()
+    _cache[cache_key] = (now, insights, ttl)
+    if shared_store.enabled():
+        payload = json.dumps({"ttl": ttl, "insights": insights}).encode()
+        shared_store.put(f"insights:{cache_key}", payload, updated=now)
+
+
+def cached_at(ticker: str) -> float | None:
+    """When the cached insights for ``ticker`` were stored, if there are any."""
+    entry = _cached(ticker.upper())
+    return None if entry is None else entry[0]
+
+
+def is_fresh(ticker: str) -> bool:
+    entry = _cached(ticker.upper())
+    return entry is not None and not _is_expired(entry)
+
+
+def _serve_stale(cache_key: str) -> dict | None:
+    """Last cached insights regardless of age, for when a fresh call fails."""
+    entry = _cached(cache_key)
+    if entry is None:
+        return None
+    cached_time, cached_data, _ = entry
+    note_stale(time.time() - cached_time)
+    return cached_data
+
+
+def get_insights(stock_data: dict, ticker: str, refresh: bool = False) -> dict | None:
+    """Ratio insights for ``ticker``, cached for CACHE_TTL (or the TTL the
+    bulk job stored them with).
+
+    Inside a request deadline the Claude call gets only the time left; if
+    it fails or times out, expired cached insights are served as stale.
+    """
+    key = api_key()
+    if not key:
         logger.info("CLAUDE_API_KEY not configured, skipping insights")
         return None
 
     # Check cache
     cache_key = ticker.upper()
-    if cache_key in _cache:
-        cached_time, cached_data = _cache[cache_key]
-        if time.time() - cached_time < CACHE_TTL:
-            return cached_data
+    entry = None if refresh else _cached(cache_key)
+    if entry is not None and not _is_expired(entry):
+        metrics.note_cache("hit")
+        return entry[1]
+    metrics.note_cache("miss")
+
+    left = time_left()
+    if left is not None and left < MIN_CALL_SECONDS:
+        logger.info("Not enough time left to call Claude for %s", ticker)
+        return _serve_stale(cache_key)
 
     prompt = _build_prompt(stock_data)
 
     try:
-        client = anthropic.Anthropic(api_key=api_key)
+        client = get_client(key)
+        if left is not None:
+            client = client.with_options(timeout=left, max_retries=0)
         message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1500,
+            model=MODEL,
+            max_tokens=MAX_TOKENS,
+            system=SYSTEM_PROMPT,
             messages=[{"role": "user", "content": prompt}],
         )
         response_text = message.content[0].text
         insights = _parse_response(response_text)
 
         if insights:
-            _cache[cache_key] = (time.time(), insights)
-
-        return insights
+            store(cache_key, insights)
+            return insights
+        return _serve_stale(cache_key)
 
     except Exception:
         logger.exception("Claude API call failed for %s", ticker)
-        return None
+        return _serve_stale(cache_key)
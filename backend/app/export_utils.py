@@ -0,0 +1,181 @@
+"""Streaming bulk export of historical bars.
+
+Exports are produced by generators that hold at most ``EXPORT_PREFETCH + 1``
+tickers' bars at a time and emit them in ``EXPORT_CHUNK_ROWS``-row chunks,
+so peak memory does not grow with the number of tickers. The next tickers
+are downloaded on a worker thread while the current one is being encoded.
+
+Every export is a one-off range request (full history when no ``start`` is
+given), so it never goes through, or fills, the bar cache. Fetches run in a
+``background_scope``: they only use spare upstream capacity, so a large
+export can't starve interactive requests. Tickers whose upstream is
+unavailable, or that get no capacity within ``EXPORT_MAX_WAIT``, are
+reported in the stream rather than dropped.
+"""
+
+import io
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from app.providers import get_provider
+from app.providers.base import EARLIEST_START
+from app.resilience import UpstreamUnavailable, background_scope
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_PREFETCH = int(os.getenv("EXPORT_PREFETCH", "2"))
+EXPORT_MAX_TICKERS = int(os.getenv("EXPORT_MAX_TICKERS", "500"))
+# Seconds each ticker waits for spare upstream capacity before it is
+# reported as unavailable
+EXPORT_MAX_WAIT = float(os.getenv("EXPORT_MAX_WAIT", "30"))
+
+EXPORT_COLUMNS = ["Ticker", "Date", "Open", "High", "Low", "Close", "Volume"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+UNAVAILABLE = "upstream unavailable"
+
+
+def _fetch(ticker: str, start: str | None, end: str | None, interval: str) -> pd.DataFrame | None:
+    """Bars for the export range, or None when the upstream is unavailable."""
+    try:
+        with background_scope(EXPORT_MAX_WAIT):
+            return get_provider().bars(ticker, interval=interval, start=start or EARLIEST_START, end=end)
+    except UpstreamUnavailable:
+        logger.warning("Export of %s failed: upstream unavailable", ticker)
+        return None
+
+
+def iter_ticker_bars(tickers: list[str], start: str | None, end: str | None, interval: str):
+    """Yield ``(ticker, bars)`` in order, fetching up to EXPORT_PREFETCH
+    tickers ahead of the consumer."""
+    with ThreadPoolExecutor(max_workers=max(1, EXPORT_PREFETCH), thread_name_prefix="export") as pool:
+        pending = deque()
+        remaining = iter(tickers)
+        for ticker in remaining:
+            pending.append((ticker, pool.submit(_fetch, ticker, start, end, interval)))
+            if len(pending) >= EXPORT_PREFETCH:
+                break
+        while pending:
+            ticker, future = pending.popleft()
+            next_ticker = next(remaining, None)
+            if next_ticker is not None:
+                pending.append((next_ticker, pool.submit(_fetch, next_ticker, start, end, interval)))
+            yield ticker, future.result()
+
+
+def iter_chunks(tickers: list[str], start: str | None, end: str | None, interval: str):
+    """Yield ``(ticker, frame)`` with export-shaped frames of at most
+    EXPORT_CHUNK_ROWS rows; ``frame`` is None for an unavailable ticker."""
+    for ticker, bars in iter_ticker_bars(tickers, start, end, interval):
+        if bars is None:
+            yield ticker.upper(), None
+            continue
+        if bars.empty:
+            continue
+        frame = bars.reset_index()
+        frame.insert(0, "Ticker", ticker.upper())
+        frame["Volume"] = frame["Volume"].astype("int64")
+        frame = frame[EXPORT_COLUMNS]
+        for offset in range(0, len(frame), EXPORT_CHUNK_ROWS):
+            yield ticker.upper(), frame.iloc[offset:offset + EXPORT_CHUNK_ROWS]
+
+
+def stream_csv(tickers, start, end, interval):
+    """CSV rows; an unavailable ticker becomes a ``# error: ...`` comment line."""
+    yield ",".join(EXPORT_COLUMNS) + "\n"
+    for ticker, chunk in iter_chunks(tickers, start, end, interval):
+        if chunk is None:
+            yield f"# error: {ticker} {UNAVAILABLE}\n"
+            continue
+        chunk = chunk.assign(Date=chunk["Date"].map(pd.Timestamp.isoformat))
+        yield chunk.to_csv(header=False, index=False)
+
+
+def stream_ndjson(tickers, start, end, interval):
+    """One JSON object per bar; an unavailable ticker becomes
+    ``{"Ticker": ..., "error": ...}``."""
+    for ticker, chunk in iter_chunks(tickers, start, end, interval):
+        if chunk is None:
+            yield json.dumps({"Ticker": ticker, "error": UNAVAILABLE}) + "\n"
+            continue
+        dates = chunk["Date"].map(pd.Timestamp.isoformat).tolist()
+        lines = []
+        for date, row in zip(dates, chunk.itertuples(index=False)):
+            lines.append(json.dumps({
+                "Ticker": row.Ticker,
+                "Date": date,
+                "Open": float(row.Open),
+                "High": float(row.High),
+                "Low": float(row.Low),
+                "Close": float(row.Close),
+                "Volume": int(row.Volume),
+            }))
+        yield "\n".join(lines) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers bytes until drained."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_arrow(tickers, start, end, interval):
+    """Arrow IPC stream, one record batch per chunk. Intraday timestamps are
+    converted to naive UTC so every batch shares one schema.
+
+    The fixed schema has no room for error rows, so an unavailable ticker
+    aborts the response after the data streamed so far; readers see a
+    truncated body instead of a silently incomplete table.
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("Ticker", pa.string()),
+        ("Date", pa.timestamp("ns")),
+        ("Open", pa.float64()),
+        ("High", pa.float64()),
+        ("Low", pa.float64()),
+        ("Close", pa.float64()),
+        ("Volume", pa.int64()),
+    ])
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+    for ticker, chunk in iter_chunks(tickers, start, end, interval):
+        if chunk is None:
+            raise UpstreamUnavailable(f"Export aborted: {ticker} {UNAVAILABLE}")
+        dates = chunk["Date"]
+        if dates.dt.tz is not None:
+            chunk = chunk.assign(Date=dates.dt.tz_convert("UTC").dt.tz_localize(None))
+        writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+STREAMERS = {"csv": stream_csv, "ndjson": stream_ndjson, "arrow": stream_arrow}
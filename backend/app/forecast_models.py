@@ -0,0 +1,113 @@
+"""Forecast models, from microsecond NumPy baselines up to statsmodels ARIMA.
+
+Every model takes a 1-D array of closes and returns a dict with the point
+forecast and a 95% interval as arrays, plus the name and ARIMA-equivalent
+order actually used:
+
+- ``drift``: random walk with drift, i.e. ARIMA(0,1,0) with a constant
+- ``ses``: simple exponential smoothing, i.e. ARIMA(0,1,1)
+- ``ar``: least-squares AR(p) on daily changes, i.e. ARIMA(p,1,0)
+- ``arima``: statsmodels ARIMA(2,1,2) fitted by maximum likelihood
+"""
+
+import numpy as np
+
+ARIMA_ORDER = (2, 1, 2)
+AR_LAGS = 2
+Z_95 = 1.959963984540054
+SES_ALPHAS = np.linspace(0.01, 0.99, 50)
+
+# Reported name and ARIMA-equivalent order per tier
+TIER_LABELS = {
+    "drift": ("Drift", (0, 1, 0)),
+    "ses": ("SES", (0, 1, 1)),
+    "ar": ("AR", (AR_LAGS, 1, 0)),
+    "arima": ("ARIMA", ARIMA_ORDER),
+}
+
+
+def _result(tier: str, mean: np.ndarray, variance: np.ndarray) -> dict:
+    name, order = TIER_LABELS[tier]
+    spread = Z_95 * np.sqrt(variance)
+    return {
+        "model": name,
+        "order": list(order),
+        "mean": mean,
+        "lower": mean - spread,
+        "upper": mean + spread,
+    }
+
+
+def drift(close: np.ndarray, steps: int) -> dict:
+    changes = np.diff(close)
+    mu = changes.mean()
+    sigma2 = changes.var(ddof=1)
+    h = np.arange(1, steps + 1)
+    # The extra h/n term accounts for uncertainty in the estimated drift
+    variance = sigma2 * h * (1 + h / len(changes))
+    return _result("drift", close[-1] + mu * h, variance)
+
+
+def ses(close: np.ndarray, steps: int) -> dict:
+    # Run the smoothing recursion for every candidate alpha at once
+    level = np.full(SES_ALPHAS.shape, close[0])
+    sse = np.zeros_like(SES_ALPHAS)
+    for value in close[1:]:
+        error = value - level
+        sse += error * error
+        level += SES_ALPHAS * error
+    best = int(np.argmin(sse))
+    alpha = SES_ALPHAS[best]
+    sigma2 = sse[best] / (len(close) - 1)
+    h = np.arange(1, steps + 1)
+    variance = sigma2 * (1 + (h - 1) * alpha * alpha)
+    return _result("ses", np.full(steps, level[best]), variance)
+
+
+def ar(close: np.ndarray, steps: int) -> dict:
+    lags = AR_LAGS
+    changes = np.diff(close)
+    n = len(changes)
+    # Design matrix [1, d[t-1], ..., d[t-p]] for t = p..n-1
+    design = np.column_stack([np.ones(n - lags)] + [changes[lags - k:n - k] for k in range(1, lags + 1)])
+    target = changes[lags:]
+    coef, *_ = np.linalg.lstsq(design, target, rcond=None)
+    residuals = target - design @ coef
+    sigma2 = residuals @ residuals / max(1, len(target) - lags - 1)
+    intercept, phi = coef[0], coef[1:]
+
+    history = list(changes[-lags:])
+    predicted = np.empty(steps)
+    for i in range(steps):
+        predicted[i] = intercept + phi @ np.array(history[::-1][:lags])
+        history.append(predicted[i])
+
+    # psi-weights of the AR on changes, summed to get the price-level weights
+    psi = np.zeros(steps)
+    psi[0] = 1.0
+    for j in range(1, steps):
+        psi[j] = sum(phi[i] * psi[j - 1 - i] for i in range(min(lags, j)))
+    level_weights = np.cumsum(psi)
+    variance = sigma2 * np.cumsum(level_weights ** 2)
+    return _result("ar", close[-1] + np.cumsum(predicted), variance)
+
+
+def arima(close: np.ndarray, steps: int) -> dict:
+    # statsmodels takes ~1s to import; load it on first forecast, not at startup
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model_fit = ARIMA(close, order=ARIMA_ORDER).fit()
+    forecast = model_fit.get_forecast(steps=steps)
+    interval = forecast.conf_int(alpha=0.05)
+    name, order = TIER_LABELS["arima"]
+    return {
+        "model": name,
+        "order": list(order),
+        "mean": np.asarray(forecast.predicted_mean),
+        "lower": np.asarray(interval[:, 0]),
+        "upper": np.asarray(interval[:, 1]),
+    }
+
+
+# Cheapest first; under a latency budget the last one that finishes wins
+TIERS = {"drift": drift, "ses": ses, "ar": ar, "arima": arima}
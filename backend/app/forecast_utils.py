@@ -1,33 +1,102 @@
-import yfinance as yf
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
+
+from app.forecast_models import TIER_LABELS, TIERS
+from app.bar_cache import get_bars
+from app.resilience import UpstreamUnavailable
+
+MODEL_CHOICES = ("auto", *TIERS)
+
+# Slow tiers run here so a latency budget can stop waiting on them
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+_executor = ThreadPoolExecutor(max_workers=FORECAST_WORKERS, thread_name_prefix="forecast")
+# Submitted tiers that have not finished, including abandoned ones still running
+_pending: set = set()
+_pending_lock = threading.Lock()
+
+
+def _submit(name: str, close, days: int):
+    """Submit a tier, or return None while every worker is still busy with
+    earlier (possibly abandoned) work rather than queueing behind it."""
+    with _pending_lock:
+        if len(_pending) >= FORECAST_WORKERS:
+            return None
+        future = _executor.submit(TIERS[name], close, days)
+        _pending.add(future)
+    future.add_done_callback(_finished)
+    return future
+
+
+def _finished(future):
+    with _pending_lock:
+        _pending.discard(future)
 
 
-def fetch_forecast(ticker: str, period: str = "1y", days: int = 7) -> dict:
+def _empty(ticker: str, tier: str = "arima") -> dict:
+    name, order = TIER_LABELS[tier]
+    return {"ticker": ticker.upper(), "model": name, "order": list(order), "forecast": []}
+
+
+def _run_within_budget(close, days: int, candidates: list[str], budget_ms: int) -> dict:
+    """Run ``candidates`` (cheapest first) and return the most capable one
+    that finished within ``budget_ms``. The cheapest always runs to
+    completion so there is an answer even for a tiny budget, and runs
+    inline; the others are skipped while the pool is saturated."""
+    deadline = time.perf_counter() + budget_ms / 1000
+    best = TIERS[candidates[0]](close, days)
+    for name in candidates[1:]:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        future = _submit(name, close, days)
+        if future is None:
+            break
+        try:
+            best = future.result(timeout=remaining)
+        except FutureTimeout:
+            # Drops it if still queued; a running fit stays in _pending
+            future.cancel()
+            break
+    return best
+
+
+def fetch_forecast(
+    ticker: str,
+    period: str = "1y",
+    days: int = 7,
+    model: str = "arima",
+    budget_ms: int | None = None,
+) -> dict:
+    """Forecast the next ``days`` business-day closes.
+
+    ``model`` picks a tier (see forecast_models); ``auto`` means the most
+    capable one. With ``budget_ms`` the cheaper tiers up to the requested
+    one are tried in order and the best to finish in time is returned. The
+    ``model``/``order`` fields report what was actually used.
+    """
+    if model not in MODEL_CHOICES:
+        raise ValueError(f"model must be one of {', '.join(MODEL_CHOICES)}")
+    target = "arima" if model == "auto" else model
+
     try:
-        data = yf.download(
-            tickers=ticker,
-            period=period,
-            auto_adjust=True,
-            progress=False,
-        )
+        data = get_bars(ticker, period, "1d")
         if data.empty:
-            return {"ticker": ticker, "model": "ARIMA", "order": [2, 1, 2], "forecast": []}
-
-        # yfinance may return MultiIndex columns; flatten them
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
+            return _empty(ticker, target)
 
         close = data["Close"].dropna()
         if len(close) < 30:
-            return {"ticker": ticker, "model": "ARIMA", "order": [2, 1, 2], "forecast": []}
-
-        model = ARIMA(close, order=(2, 1, 2))
-        model_fit = model.fit()
+            return _empty(ticker, target)
 
-        forecast_result = model_fit.get_forecast(steps=days)
-        predicted = forecast_result.predicted_mean
-        conf_int = forecast_result.conf_int(alpha=0.05)
+        values = close.to_numpy(dtype=float)
+        if budget_ms is not None:
+            tiers = list(TIERS)
+            result = _run_within_budget(values, days, tiers[:tiers.index(target) + 1], budget_ms)
+        else:
+            result = TIERS[target](values, days)
 
         last_date = close.index[-1]
         future_dates = pd.bdate_range(start=last_date + pd.Timedelta(days=1), periods=days)
@@ -36,16 +105,18 @@ def fetch_forecast(ticker: str, period: str = "1y", days: int = 7) -> dict:
         for i in range(days):
             forecast_list.append({
                 "Date": future_dates[i].isoformat(),
-                "Price": round(float(predicted.iloc[i]), 2),
-                "Upper": round(float(conf_int.iloc[i, 1]), 2),
-                "Lower": round(float(conf_int.iloc[i, 0]), 2),
+                "Price": round(float(result["mean"][i]), 2),
+                "Upper": round(float(result["upper"][i]), 2),
+                "Lower": round(float(result["lower"][i]), 2),
             })
 
         return {
             "ticker": ticker.upper(),
-            "model": "ARIMA",
-            "order": [2, 1, 2],
+            "model": result["model"],
+            "order": result["order"],
             "forecast": forecast_list,
         }
+    except UpstreamUnavailable:
+        raise
     except Exception:
-        return {"ticker": ticker.upper(), "model": "ARIMA", "order": [2, 1, 2], "forecast": []}
+        return _empty(ticker, target)
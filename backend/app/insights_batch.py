@@ -0,0 +1,192 @@
+"""Bulk AI insights through the Message Batches API.
+
+Refreshing insights for a whole watchlist one synchronous call at a time is
+slow and resends the full instructions for every ticker. This job instead:
+
+- groups ``INSIGHTS_BATCH_GROUP`` tickers per request, so the shared
+  instructions (``SYSTEM_PROMPT``) are sent once per group;
+- submits all groups as one batch, billed at half the synchronous price;
+- polls until the batch has ended, splits each answer per ticker, validates
+  it with ``_parse_response`` and caches it for ``INSIGHTS_BULK_TTL`` seconds,
+  so an overnight run lasts until the next one.
+
+Run it from cron for overnight refreshes::
+
+    python -m app.insights_batch            # screener universe
+    python -m app.insights_batch AAPL MSFT
+"""
+
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import claude_insights
+from app.claude_insights import _build_prompt, _parse_response
+from app.resilience import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+INSIGHTS_BATCH_GROUP = int(os.getenv("INSIGHTS_BATCH_GROUP", "5"))
+INSIGHTS_BATCH_POLL = float(os.getenv("INSIGHTS_BATCH_POLL", "30"))
+# Batches are processed within 24 hours
+INSIGHTS_BATCH_MAX_WAIT = float(os.getenv("INSIGHTS_BATCH_MAX_WAIT", "86400"))
+INFO_WORKERS = 4
+
+# USD per million tokens for MODEL; batch requests are billed at half
+INPUT_PRICE_PER_MTOK = 3.0
+OUTPUT_PRICE_PER_MTOK = 15.0
+BATCH_DISCOUNT = 0.5
+
+GROUP_INSTRUCTIONS = (
+    "Evaluate each of the following {count} companies independently. For each one, "
+    "in the order given, write a line `### <TICKER>` followed by its JSON evaluation. "
+    "Write nothing else."
+)
+_SECTION = re.compile(r"^###\s*(\S+)\s*$", re.MULTILINE)
+
+
+def _build_group_prompt(stocks: dict[str, dict]) -> str:
+    sections = [f"### {ticker}\n{_build_prompt(data)}" for ticker, data in stocks.items()]
+    return "\n\n".join([GROUP_INSTRUCTIONS.format(count=len(stocks)), *sections])
+
+
+def _split_sections(text: str) -> dict[str, str]:
+    """Map each ``### TICKER`` header in a group answer to the text under it."""
+    headers = list(_SECTION.finditer(text))
+    sections = {}
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        sections[match.group(1).upper()] = text[match.end():end]
+    return sections
+
+
+def build_requests(stocks: dict[str, dict], group_size: int = INSIGHTS_BATCH_GROUP) -> tuple[list[dict], dict[str, list[str]]]:
+    """Batch requests for ``stocks`` and the tickers behind each custom_id."""
+    tickers = list(stocks)
+    requests, groups = [], {}
+    for start in range(0, len(tickers), group_size):
+        group = tickers[start:start + group_size]
+        custom_id = f"group-{start // group_size}"
+        groups[custom_id] = group
+        requests.append({
+            "custom_id": custom_id,
+            "params": {
+                "model": claude_insights.MODEL,
+                "max_tokens": claude_insights.MAX_TOKENS * len(group),
+                "system": claude_insights.SYSTEM_PROMPT,
+                "messages": [{"role": "user", "content": _build_group_prompt({t: stocks[t] for t in group})}],
+            },
+        })
+    return requests, groups
+
+
+def _fetch_stocks(tickers: list[str]) -> dict[str, dict]:
+    from app.stock_utils import fetch_ticker_info
+
+    def fetch(ticker):
+        try:
+            return fetch_ticker_info(ticker)
+        except UpstreamUnavailable:
+            logger.warning("Bulk insights skipped %s: upstream unavailable", ticker)
+            return None
+
+    with ThreadPoolExecutor(max_workers=INFO_WORKERS, thread_name_prefix="insights-info") as pool:
+        fetched = dict(zip(tickers, pool.map(fetch, tickers)))
+    return {ticker: info for ticker, info in fetched.items() if info}
+
+
+def _wait(client, batch_id: str, poll_interval: float, max_wait: float):
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            return batch
+        if time.monotonic() >= deadline:
+            client.messages.batches.cancel(batch_id)
+            raise TimeoutError(f"Insights batch {batch_id} still {batch.processing_status} after {max_wait:.0f}s")
+        time.sleep(poll_interval)
+
+
+def cost_usd(input_tokens: int, output_tokens: int, batch: bool = True) -> float:
+    cost = (input_tokens * INPUT_PRICE_PER_MTOK + output_tokens * OUTPUT_PRICE_PER_MTOK) / 1_000_000
+    return round(cost * (BATCH_DISCOUNT if batch else 1.0), 4)
+
+
+def run_bulk_insights(
+    tickers: list[str],
+    refresh: bool = False,
+    group_size: int = INSIGHTS_BATCH_GROUP,
+    poll_interval: float = INSIGHTS_BATCH_POLL,
+    max_wait: float = INSIGHTS_BATCH_MAX_WAIT,
+) -> dict:
+    """Generate insights for ``tickers`` in one batch and cache them.
+
+    Tickers with fresh cached insights are skipped unless ``refresh``.
+    Returns a summary with per-ticker failures, token usage, cost and time.
+    """
+    started = time.monotonic()
+    summary = {"batchId": None, "requested": 0, "succeeded": [], "failed": [], "skipped": [],
+               "inputTokens": 0, "outputTokens": 0, "costUsd": 0.0, "seconds": 0.0}
+    api_key = claude_insights.api_key()
+    if not api_key:
+        logger.info("CLAUDE_API_KEY not configured, skipping bulk insights")
+        return summary
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not refresh:
+        summary["skipped"] = [t for t in tickers if claude_insights.is_fresh(t)]
+        tickers = [t for t in tickers if t not in summary["skipped"]]
+    stocks = _fetch_stocks(tickers)
+    summary["failed"] = [t for t in tickers if t not in stocks]
+    if not stocks:
+        summary["seconds"] = round(time.monotonic() - started, 2)
+        return summary
+
+    requests, groups = build_requests(stocks, group_size)
+    summary["requested"] = len(stocks)
+    client = claude_insights.get_client(api_key)
+    batch = client.messages.batches.create(requests=requests)
+    summary["batchId"] = batch.id
+    logger.info("Submitted insights batch %s: %d tickers in %d requests", batch.id, len(stocks), len(requests))
+    _wait(client, batch.id, poll_interval, max_wait)
+
+    answered = set()
+    for item in client.messages.batches.results(batch.id):
+        group = groups.get(item.custom_id, [])
+        if item.result.type != "succeeded":
+            logger.warning("Insights batch request %s %s", item.custom_id, item.result.type)
+            continue
+        message = item.result.message
+        summary["inputTokens"] += message.usage.input_tokens
+        summary["outputTokens"] += message.usage.output_tokens
+        sections = _split_sections(message.content[0].text)
+        for ticker in group:
+            insights = _parse_response(sections[ticker]) if ticker in sections else None
+            if insights:
+                claude_insights.store(ticker, insights, ttl=claude_insights.INSIGHTS_BULK_TTL)
+                answered.add(ticker)
+
+    summary["succeeded"] = [t for t in stocks if t in answered]
+    summary["failed"] += [t for t in stocks if t not in answered]
+    summary["costUsd"] = cost_usd(summary["inputTokens"], summary["outputTokens"])
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        "Insights batch %s: %d/%d tickers, $%.4f, %.0fs",
+        batch.id, len(summary["succeeded"]), len(stocks), summary["costUsd"], summary["seconds"],
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from app import shared_store
+    from app.screener import load_universe
+
+    # Results must outlive this process: write them where the API workers read
+    os.environ.setdefault("SHARED_STORE_PATH", shared_store.DEFAULT_STORE_PATH)
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(run_bulk_insights(sys.argv[1:] or load_universe()), indent=2))
@@ -1,9 +1,80 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import math
+import os
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from app import backtest_utils, metrics, popularity, screener, warmup
+from app.providers.base import InvalidRequest
+from app.resilience import UpstreamUnavailable, deadline_scope
 from app.routers import auth, stock
 
-app = FastAPI(title="Stock Chart API")
 
+# Per-request upstream deadline in milliseconds; X-Request-Deadline overrides
+# it (up to MAX_REQUEST_DEADLINE_MS). Insights wait on a model call, so they
+# get a longer default. Streaming exports are exempt.
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "8000"))
+INSIGHTS_DEADLINE_MS = int(os.getenv("INSIGHTS_DEADLINE_MS", "30000"))
+MAX_REQUEST_DEADLINE_MS = int(os.getenv("MAX_REQUEST_DEADLINE_MS", "60000"))
+NO_DEADLINE_PATHS = {"/api/stock/export"}
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    warmup.start_warm_up()
+    screener.start_refresher()
+    popularity.start_prefetcher()
+    yield
+    popularity.stop_prefetcher()
+    screener.stop_refresher()
+    backtest_utils.shutdown_pool()
+
+
+app = FastAPI(title="Stock Chart API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def track_ticker_requests(request: Request, call_next):
+    started = time.perf_counter()
+    with metrics.request_scope() as outcome:
+        response = await call_next(request)
+    ticker = request.scope.get("path_params", {}).get("ticker")
+    # Only successful lookups count, so typos never become "hot"
+    if ticker and response.status_code < 400:
+        popularity.record(ticker)
+        metrics.record(ticker, time.perf_counter() - started, outcome)
+    return response
+
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    if request.url.path in NO_DEADLINE_PATHS:
+        return await call_next(request)
+    header = request.headers.get("X-Request-Deadline")
+    if header is not None:
+        try:
+            budget_ms = min(int(header), MAX_REQUEST_DEADLINE_MS)
+        except ValueError:
+            budget_ms = 0
+        if budget_ms <= 0:
+            return JSONResponse(
+                status_code=400,
+                content={"detail": "X-Request-Deadline must be a positive number of milliseconds"},
+            )
+    elif request.url.path.endswith("/insights"):
+        budget_ms = INSIGHTS_DEADLINE_MS
+    else:
+        budget_ms = REQUEST_DEADLINE_MS
+    with deadline_scope(budget_ms / 1000):
+        return await call_next(request)
+
+
+# Registered last so it wraps the middlewares above: responses they
+# short-circuit (e.g. a bad X-Request-Deadline) still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -12,6 +83,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(InvalidRequest)
+def invalid_request(_request: Request, exc: InvalidRequest):
+    # Arguments the upstream rejected past route validation (e.g. 1m bars for 1y)
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(UpstreamUnavailable)
+def upstream_unavailable(_request: Request, exc: UpstreamUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(stock.router, prefix="/api/stock", tags=["stock"])
 
@@ -19,3 +106,11 @@ app.include_router(stock.router, prefix="/api/stock", tags=["stock"])
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/api/ready")
+def ready():
+    state = warmup.readiness()
+    if not state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming", **state})
+    return {"status": "ready", **state}
@@ -0,0 +1,83 @@
+"""Per-ticker request latency and cache outcome tracking.
+
+The request middleware opens a ``request_scope``; provider cache lookups
+inside it report ``hit``/``stale``/``miss`` via ``note_cache``. On the way
+out the request's latency and overall outcome are recorded against its
+ticker, so hit rate and tail latency can be compared per symbol.
+"""
+
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+SAMPLES_PER_TICKER = 1000
+
+_outcome: ContextVar[dict | None] = ContextVar("cache_outcome", default=None)
+_samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=SAMPLES_PER_TICKER))
+_lock = threading.Lock()
+
+
+@contextmanager
+def request_scope():
+    counts = {"hit": 0, "stale": 0, "miss": 0}
+    token = _outcome.set(counts)
+    try:
+        yield counts
+    finally:
+        _outcome.reset(token)
+
+
+def note_cache(status: str):
+    counts = _outcome.get()
+    if counts is not None:
+        counts[status] += 1
+
+
+def classify(counts: dict) -> str:
+    """A request is a miss if any lookup went upstream, stale if any was
+    served stale, and a hit only when every lookup was fresh."""
+    if counts["miss"]:
+        return "miss"
+    if counts["stale"]:
+        return "stale"
+    return "hit" if counts["hit"] else "none"
+
+
+def record(ticker: str, seconds: float, counts: dict):
+    with _lock:
+        _samples[ticker.upper()].append((seconds, classify(counts)))
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def _summarise(samples: list) -> dict:
+    latencies = np.array([s[0] for s in samples]) * 1000
+    outcomes = [s[1] for s in samples]
+    looked_up = sum(o != "none" for o in outcomes)
+    cached = sum(o in ("hit", "stale") for o in outcomes)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "hitRate": round(cached / looked_up, 4) if looked_up else None,
+        "staleRate": round(outcomes.count("stale") / looked_up, 4) if looked_up else None,
+        "p50Ms": round(float(p50), 2),
+        "p95Ms": round(float(p95), 2),
+        "p99Ms": round(float(p99), 2),
+    }
+
+
+def snapshot(tickers: list[str] | None = None) -> dict:
+    """Latency/hit-rate summary per ticker, plus ``_all`` across them."""
+    with _lock:
+        selected = {t: list(s) for t, s in _samples.items() if s and (tickers is None or t in tickers)}
+    summary = {t: _summarise(s) for t, s in selected.items()}
+    combined = [x for s in selected.values() for x in s]
+    if combined:
+        summary["_all"] = _summarise(combined)
+    return summary
@@ -0,0 +1,156 @@
+"""Popularity tracking and refresh-ahead prefetching for hot tickers.
+
+Every successful ticker request bumps an exponentially decaying counter.
+A background loop takes the top-K tickers and refreshes their provider
+cache entries (and cached AI insights) shortly before they expire, so the
+next user finds a fresh entry instead of paying for the upstream call.
+Refreshes are capped per cycle and only take rate-limit tokens that are
+free at that moment, so prefetching never delays real requests.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import claude_insights
+from app.providers import get_provider
+from app.providers.guarded import GuardedProvider
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", "3600"))
+POPULARITY_MAX_TRACKED = 5000
+PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", "25"))
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "15"))
+PREFETCH_LEAD = float(os.getenv("PREFETCH_LEAD", "60"))
+PREFETCH_MAX_PER_CYCLE = int(os.getenv("PREFETCH_MAX_PER_CYCLE", "10"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+PREFETCH_INSIGHTS_PER_CYCLE = int(os.getenv("PREFETCH_INSIGHTS_PER_CYCLE", "2"))
+PREFETCH_INSIGHTS_LEAD = float(os.getenv("PREFETCH_INSIGHTS_LEAD", "300"))
+
+
+class DecayingCounter:
+    """Request counts that halve every ``half_life`` seconds, so the ranking
+    follows current traffic rather than all-time totals."""
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE, max_tracked: int = POPULARITY_MAX_TRACKED):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._scores: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * math.pow(2.0, -(now - updated) / self.half_life)
+
+    def add(self, key: str, amount: float = 1.0, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            score, updated = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated, now) + amount, now)
+            if len(self._scores) > self.max_tracked:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        ranked = sorted(self._scores, key=lambda k: self._decayed(*self._scores[k], now))
+        for key in ranked[:len(ranked) - self.max_tracked]:
+            del self._scores[key]
+
+    def top(self, k: int, now: float | None = None) -> list[tuple[str, float]]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            scored = [(key, self._decayed(s, u, now)) for key, (s, u) in self._scores.items()]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+
+counter = DecayingCounter()
+prefetch_stats = {"cycles": 0, "refreshed": 0, "skipped": 0, "failed": 0, "insights": 0}
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+_pool = ThreadPoolExecutor(max_workers=max(1, PREFETCH_CONCURRENCY), thread_name_prefix="prefetch")
+
+
+def prefetch_enabled() -> bool:
+    return os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def record(ticker: str):
+    counter.add(ticker.upper())
+
+
+def _refresh_insights(ticker: str) -> bool:
+    from app.stock_utils import fetch_ticker_info
+
+    info = fetch_ticker_info(ticker)
+    if not info:
+        return False
+    before = claude_insights.cached_at(ticker)
+    claude_insights.get_insights(info, ticker, refresh=True)
+    # A failed call falls back to the old entry, so check it was replaced
+    return claude_insights.cached_at(ticker) != before
+
+
+def run_prefetch_cycle() -> dict:
+    """Refresh cache entries of the current top-K tickers that expire within
+    PREFETCH_LEAD seconds. Returns this cycle's counts."""
+    hot = [ticker for ticker, _ in counter.top(PREFETCH_TOP_K)]
+    cycle = {"refreshed": 0, "skipped": 0, "failed": 0, "insights": 0}
+    if not hot:
+        return cycle
+
+    futures = []
+    provider = get_provider()
+    if isinstance(provider, GuardedProvider):
+        keys = provider.expiring(set(hot), PREFETCH_LEAD)
+        keys.sort(key=lambda key: hot.index(key[1]))
+        cycle["skipped"] = max(0, len(keys) - PREFETCH_MAX_PER_CYCLE)
+        for key in keys[:PREFETCH_MAX_PER_CYCLE]:
+            futures.append(("refreshed", _pool.submit(provider.refresh_ahead, key)))
+
+    expiring = claude_insights.expiring(set(hot), PREFETCH_INSIGHTS_LEAD)
+    expiring.sort(key=hot.index)
+    for ticker in expiring[:PREFETCH_INSIGHTS_PER_CYCLE]:
+        futures.append(("insights", _pool.submit(_refresh_insights, ticker)))
+
+    for kind, future in futures:
+        try:
+            ok = future.result()
+        except Exception:
+            logger.exception("Prefetch failed")
+            ok = False
+        cycle[kind if ok else "failed"] += 1
+
+    prefetch_stats["cycles"] += 1
+    for key, value in cycle.items():
+        prefetch_stats[key] += value
+    return cycle
+
+
+def _prefetch_loop():
+    while not _stop.wait(PREFETCH_INTERVAL):
+        try:
+            run_prefetch_cycle()
+        except Exception:
+            logger.exception("Prefetch cycle failed")
+
+
+def start_prefetcher() -> threading.Thread | None:
+    global _thread
+    if not prefetch_enabled() or (_thread and _thread.is_alive()):
+        return None
+    _stop.clear()
+    _thread = threading.Thread(target=_prefetch_loop, name="prefetch", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop_prefetcher():
+    _stop.set()
@@ -0,0 +1,74 @@
+import os
+
+from app.providers.base import MarketDataProvider
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
+
+_provider: MarketDataProvider | None = None
+
+
+def _build_provider(name: str) -> MarketDataProvider:
+    market_dir = os.getenv("MARKET_DATA_DIR", os.path.join(DATA_DIR, "market"))
+    replay_dir = os.getenv("MARKET_DATA_REPLAY_DIR", os.path.join(DATA_DIR, "replay"))
+
+    if name == "yfinance":
+        from app.providers.yfinance_provider import YFinanceProvider
+
+        return YFinanceProvider()
+    if name == "local":
+        from app.providers.local import LocalProvider
+
+        return LocalProvider(market_dir)
+    if name == "replay":
+        from app.providers.replay import ReplayProvider
+
+        return ReplayProvider(replay_dir)
+    if name == "record":
+        from app.providers.replay import RecordingProvider
+        from app.providers.yfinance_provider import YFinanceProvider
+
+        return RecordingProvider(YFinanceProvider(), replay_dir)
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{name}'")
+
+
+def _guard(provider: MarketDataProvider) -> MarketDataProvider:
+    from app import shared_store
+    from app.providers.guarded import GuardedProvider
+    from app.resilience import CircuitBreaker, TokenBucket
+
+    rate = float(os.getenv("UPSTREAM_RATE", "2"))
+    capacity = float(os.getenv("UPSTREAM_BURST", "5"))
+    shared = shared_store.enabled()
+    # With several worker processes the limit must hold for the instance
+    if shared:
+        bucket = shared_store.SharedTokenBucket("upstream", rate=rate, capacity=capacity)
+    else:
+        bucket = TokenBucket(rate=rate, capacity=capacity)
+    return GuardedProvider(
+        provider,
+        bucket=bucket,
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("UPSTREAM_BREAKER_RESET", "30")),
+        ),
+        max_wait=float(os.getenv("UPSTREAM_MAX_WAIT", "2")),
+        shared=shared,
+    )
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide provider selected by MARKET_DATA_PROVIDER.
+
+    Remote providers come wrapped in a GuardedProvider.
+    """
+    global _provider
+    if _provider is None:
+        provider = _build_provider(os.getenv("MARKET_DATA_PROVIDER", "yfinance"))
+        _provider = _guard(provider) if provider.remote else provider
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider | None):
+    """Install a provider explicitly (``None`` re-reads the environment)."""
+    global _provider
+    _provider = provider
@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Calendar lookback for each yfinance-style period string. "Nd" periods are
+# counted in trading sessions instead (see slice_period).
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Start of "all history" for range requests (Yahoo has nothing older)
+EARLIEST_START = "1970-01-02"
+
+# Every period / interval the upstream accepts
+PERIODS = ("1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max")
+INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo")
+
+
+class InvalidRequest(ValueError):
+    """A request the upstream rejects because of its arguments (bad period,
+    interval, range). Routes return 400; it never counts as an upstream
+    failure."""
+
+
+def check_bar_request(period: str | None, interval: str):
+    if period is not None and period not in PERIODS:
+        raise InvalidRequest(f"period must be one of {', '.join(PERIODS)}")
+    if interval not in INTERVALS:
+        raise InvalidRequest(f"interval must be one of {', '.join(INTERVALS)}")
+
+
+class MarketDataProvider(ABC):
+    """Source of price bars, quote info and analyst data.
+
+    Implementations return the same shapes yfinance does after normalisation,
+    so stock_utils and forecast_utils never need to know which upstream is
+    behind them.
+    """
+
+    name = "base"
+    # Remote providers get rate limiting, a circuit breaker and a
+    # stale-while-revalidate cache (see providers.guarded)
+    remote = False
+
+    @abstractmethod
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        """OHLCV bars indexed by a ``Date`` index, or an empty frame.
+
+        When ``start``/``end`` are given they select the range (``end``
+        exclusive) and ``period`` is ignored.
+        """
+
+    def series(self, ticker: str, period: str = "1y", interval: str = "1d"):
+        """``bars`` as a compact ``PriceSeries``. Caching providers override
+        this to hand out the series they hold without a DataFrame round trip."""
+        from app.providers.series import PriceSeries
+
+        return PriceSeries.from_frame(self.bars(ticker, period, interval))
+
+    def is_transient(self, exc: Exception) -> bool:
+        """True for network, throttling and timeout errors, the only ones
+        that say something about upstream health."""
+        return isinstance(exc, (ConnectionError, TimeoutError))
+
+    @abstractmethod
+    def info(self, ticker: str) -> dict:
+        """Raw quote/profile dict (yfinance ``Ticker.info`` keys), or ``{}``."""
+
+    @abstractmethod
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        """Analyst recommendation counts, most recent period first."""
+
+    @abstractmethod
+    def price_targets(self, ticker: str) -> dict | None:
+        """Analyst price targets (current/low/mean/median/high)."""
+
+
+def empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+
+def normalize_bars(data: pd.DataFrame | None) -> pd.DataFrame:
+    """Flatten yfinance-style columns and name the index ``Date``."""
+    if data is None or data.empty:
+        return empty_bars()
+
+    # yfinance may return MultiIndex columns; flatten them
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+
+    data = data[[c for c in OHLCV_COLUMNS if c in data.columns]]
+    data.index = pd.DatetimeIndex(data.index, name="Date")
+    return data.sort_index()
+
+
+def parse_dates(values, tz: str | None = None) -> pd.DatetimeIndex:
+    """Parse stored timestamps into a ``Date`` index.
+
+    Intraday bars spanning a DST change carry two UTC offsets, which pandas
+    refuses to mix, so offset-aware values are read as UTC and converted to
+    ``tz`` (the exchange zone) when it is known.
+    """
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(values))
+    except ValueError:
+        index = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    if tz and index.tz is not None:
+        index = index.tz_convert(tz)
+    return index.rename("Date")
+
+
+def slice_range(data: pd.DataFrame, start: str | None, end: str | None) -> pd.DataFrame:
+    """Keep bars in ``[start, end)``; either bound may be omitted."""
+    if start is not None:
+        data = data[data.index >= _as_index_ts(start, data.index)]
+    if end is not None:
+        data = data[data.index < _as_index_ts(end, data.index)]
+    return data
+
+
+def _as_index_ts(value: str, index: pd.DatetimeIndex) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    if index.tz is not None and ts.tz is None:
+        ts = ts.tz_localize(index.tz)
+    return ts
+
+
+def slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Keep the trailing ``period`` of a bar frame, anchored at its last bar."""
+    if data.empty or period in ("max", None):
+        return data
+
+    last = data.index[-1]
+    if period == "ytd":
+        return data[data.index >= last.normalize().replace(month=1, day=1)]
+    if period.endswith("d"):
+        sessions = data.index.normalize().unique()[-int(period[:-1]):]
+        return data[data.index.normalize() >= sessions[0]]
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is None:
+        raise ValueError(f"Unsupported period '{period}'")
+    return data[data.index > last - offset]
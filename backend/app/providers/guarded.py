@@ -0,0 +1,339 @@
+import logging
+import os
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial
+from io import StringIO
+
+import pandas as pd
+
+from app import metrics, shared_store
+from app.providers.base import InvalidRequest, MarketDataProvider
+from app.providers.series import PriceSeries
+from app.resilience import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    TokenBucket,
+    UpstreamUnavailable,
+    background_wait,
+    note_stale,
+    time_left,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response counts as fresh, per provider method
+FRESH_TTL = {
+    "bars": int(os.getenv("MARKET_DATA_TTL", "300")),
+    "info": int(os.getenv("MARKET_INFO_TTL", "900")),
+    "recommendations": int(os.getenv("MARKET_INFO_TTL", "900")),
+    "price_targets": int(os.getenv("MARKET_INFO_TTL", "900")),
+}
+# Stale entries older than this are dropped rather than served
+MAX_STALE = int(os.getenv("MARKET_DATA_MAX_STALE", "86400"))
+# Bytes of cached price series held before least recently used ones are evicted
+CACHE_BYTES = int(os.getenv("MARKET_DATA_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+class GuardedProvider(MarketDataProvider):
+    """Wraps a remote provider with rate limiting, a circuit breaker and a
+    stale-while-revalidate cache of the last good response per call.
+
+    - Fresh entry: served from memory, no upstream call.
+    - Expired entry: served immediately as stale while one background refresh
+      runs; concurrent callers don't pile onto the upstream.
+    - Breaker open / no token within ``max_wait``: the last good value is
+      served as stale, or UpstreamUnavailable is raised if there is none.
+
+    Stale responses are reported through ``resilience.note_stale``.
+
+    Calls inside ``resilience.background_scope`` (the screener refresh) only
+    take a token while the bucket is full, so they never eat into the burst
+    user requests rely on.
+
+    Bars are held as compact ``PriceSeries`` and the cache is LRU-evicted
+    once their total size exceeds ``cache_bytes``.
+
+    Inside a request deadline (``resilience.deadline_scope``) the token wait
+    and the upstream call are both bounded by the time left. A call that
+    misses the deadline raises DeadlineExceeded but keeps running, and its
+    result is still cached for the next request.
+
+    With ``shared=True`` every fetched value is also written to the
+    cross-process ``shared_store``, and a worker checks it before calling the
+    upstream, so N workers cost one upstream call per key and TTL, not N.
+    """
+
+    def __init__(
+        self,
+        inner: MarketDataProvider,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker,
+        max_wait: float = 2.0,
+        refresh_workers: int = 4,
+        cache_bytes: int | None = None,
+        call_workers: int = 8,
+        shared: bool = False,
+    ):
+        self.inner = inner
+        self.name = f"guarded:{inner.name}"
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.shared = shared
+        self.cache_bytes = CACHE_BYTES if cache_bytes is None else cache_bytes
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self._refreshing: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="md-refresh")
+        self._calls = ThreadPoolExecutor(max_workers=call_workers, thread_name_prefix="md-call")
+
+    def _fetch(self, key: tuple, fn, store: bool = True, wait: float | None = None):
+        left = time_left()
+        if left == 0.0:
+            raise DeadlineExceeded("Request deadline exceeded before the upstream call")
+        if self.breaker.state == CircuitBreaker.OPEN:
+            raise UpstreamUnavailable(
+                "Market data upstream circuit open", retry_after=self.breaker.retry_after()
+            )
+        if store and self.shared:
+            # Another worker may have fetched it since our copy was taken
+            with self._lock:
+                entry = self._entries.get(key)
+            local_age = float("inf") if entry is None else time.monotonic() - entry[0]
+            adopted = self._load_shared(key, younger_than=min(local_age, FRESH_TTL[key[0]]))
+            if adopted is not None:
+                return adopted[1]
+        # Background jobs only spend tokens the bucket would otherwise waste
+        background = background_wait()
+        reserve = 0.0 if background is None else max(0.0, self.bucket.capacity - 1)
+        if wait is None:
+            wait = self.max_wait if background is None else background
+        if not self.bucket.acquire(wait if left is None else min(wait, left), reserve):
+            raise UpstreamUnavailable("Market data upstream rate limit reached", retry_after=1.0)
+        # Half-open: only one trial call goes through
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(
+                "Market data upstream circuit open", retry_after=self.breaker.retry_after()
+            )
+        if left is None:
+            return self._invoke(key, fn, store)
+
+        # The context carries the deadline into the worker, so the inner
+        # provider can size its own network timeout from it
+        future = self._calls.submit(contextvars.copy_context().run, self._invoke, key, fn, store)
+        try:
+            return future.result(timeout=time_left())
+        except FutureTimeout:
+            logger.info("Upstream %s%s missed the request deadline", key[0], key[1:])
+            raise DeadlineExceeded("Market data upstream missed the request deadline") from None
+
+    def _invoke(self, key: tuple, fn, store: bool):
+        try:
+            value = fn()
+        except InvalidRequest:
+            self.breaker.release()
+            raise
+        except Exception as exc:
+            # Only network, throttling and timeout errors count against the
+            # upstream; anything else must not let one caller open the breaker
+            if self.inner.is_transient(exc):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            logger.warning("Upstream %s%s failed: %r", key[0], key[1:], exc)
+            raise UpstreamUnavailable(f"Market data upstream error: {exc}") from exc
+        self.breaker.record_success()
+        if store:
+            self._store(key, value)
+            if self.shared:
+                self._save_shared(key, value)
+        return value
+
+    def _store(self, key: tuple, value, fetched_at: float | None = None):
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() if fetched_at is None else fetched_at, value)
+            self._bytes += getattr(value, "nbytes", 0)
+            while self._bytes > self.cache_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: tuple):
+        # Caller holds self._lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= getattr(entry[1], "nbytes", 0)
+
+    def _refresh(self, key: tuple, fn):
+        try:
+            self._fetch(key, fn)
+        except (UpstreamUnavailable, InvalidRequest):
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    @staticmethod
+    def _shared_key(key: tuple) -> str:
+        return "md:" + "|".join(str(part) for part in key)
+
+    @staticmethod
+    def _encode(method: str, value) -> bytes:
+        if method == "bars":
+            return value.to_bytes()
+        if method == "recommendations":
+            return b"null" if value is None else value.to_json(orient="split").encode()
+        # numpy scalars sometimes show up in yfinance dicts
+        return json.dumps(value, default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode()
+
+    @staticmethod
+    def _decode(method: str, payload: bytes):
+        if method == "bars":
+            return PriceSeries.from_bytes(payload)
+        if method == "recommendations" and payload != b"null":
+            return pd.read_json(StringIO(payload.decode()), orient="split")
+        return json.loads(payload)
+
+    def _save_shared(self, key: tuple, value):
+        try:
+            shared_store.put(self._shared_key(key), self._encode(key[0], value))
+        except (sqlite3.Error, TypeError, ValueError) as exc:
+            logger.warning("Shared store write for %s%s failed: %r", key[0], key[1:], exc)
+
+    def _load_shared(self, key: tuple, younger_than: float = float("inf")) -> tuple[float, object] | None:
+        """Adopt another worker's copy of ``key`` into the local cache if it
+        is younger than ``younger_than`` seconds (and than MAX_STALE)."""
+        try:
+            found = shared_store.get(self._shared_key(key))
+        except sqlite3.Error as exc:
+            logger.warning("Shared store read for %s%s failed: %r", key[0], key[1:], exc)
+            return None
+        if found is None:
+            return None
+        updated, payload = found
+        age = max(0.0, time.time() - updated)
+        if age >= min(younger_than, MAX_STALE):
+            return None
+        fetched_at = time.monotonic() - age
+        value = self._decode(key[0], payload)
+        self._store(key, value, fetched_at)
+        return fetched_at, value
+
+    def _call(self, key: tuple, fn):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.shared:
+            entry = self._load_shared(key)
+        if entry is None:
+            metrics.note_cache("miss")
+            return self._fetch(key, fn)
+
+        fetched_at, value = entry
+        age = time.monotonic() - fetched_at
+        if age < FRESH_TTL[key[0]]:
+            metrics.note_cache("hit")
+            return value
+        if age > MAX_STALE:
+            with self._lock:
+                self._drop(key)
+            metrics.note_cache("miss")
+            return self._fetch(key, fn)
+
+        with self._lock:
+            start_refresh = key not in self._refreshing and self.breaker.state != CircuitBreaker.OPEN
+            if start_refresh:
+                self._refreshing.add(key)
+        if start_refresh:
+            self._executor.submit(self._refresh, key, fn)
+        metrics.note_cache("stale")
+        note_stale(age)
+        return value
+
+    def _load_bars(self, ticker: str, period: str, interval: str) -> PriceSeries:
+        return PriceSeries.from_frame(self.inner.bars(ticker, period, interval))
+
+    def _loader(self, key: tuple):
+        method, ticker, *args = key
+        if method == "bars":
+            return partial(self._load_bars, ticker, *args)
+        return partial(getattr(self.inner, method), ticker, *args)
+
+    def cache_usage(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budgetBytes": self.cache_bytes,
+                "evictions": self.evictions,
+            }
+
+    def expiring(self, tickers: set[str], lead: float) -> list[tuple]:
+        """Cached keys for ``tickers`` that go stale within ``lead`` seconds
+        (or already have) and have no refresh in flight."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                key for key, (fetched_at, _) in self._entries.items()
+                if key[1] in tickers
+                and key not in self._refreshing
+                and now - fetched_at >= FRESH_TTL[key[0]] - lead
+            ]
+
+    def refresh_ahead(self, key: tuple) -> bool:
+        """Refresh a cached entry before it expires. Never waits for a rate
+        limit token or a closed breaker, so it only uses spare capacity."""
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            return False
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        try:
+            self._fetch(key, self._loader(key), wait=0)
+            return True
+        except UpstreamUnavailable:
+            return False
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        if start is not None or end is not None:
+            # One-off historical ranges (bulk export) are rate limited but not
+            # cached, so a large export can't flood the cache
+            key = ("bars", ticker.upper(), start, end, interval)
+            fetch = partial(self.inner.bars, ticker, interval=interval, start=start, end=end)
+            return self._fetch(key, fetch, store=False)
+        return self.series(ticker, period, interval).to_frame()
+
+    def series(self, ticker: str, period: str = "1y", interval: str = "1d") -> PriceSeries:
+        key = ("bars", ticker.upper(), period, interval)
+        return self._call(key, self._loader(key))
+
+    def info(self, ticker: str) -> dict:
+        return dict(self._call(("info", ticker.upper()), lambda: self.inner.info(ticker)))
+
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        recs = self._call(("recommendations", ticker.upper()), lambda: self.inner.recommendations(ticker))
+        return recs.copy() if recs is not None else None
+
+    def price_targets(self, ticker: str) -> dict | None:
+        return self._call(("price_targets", ticker.upper()), lambda: self.inner.price_targets(ticker))
@@ -0,0 +1,109 @@
+import json
+import os
+from functools import partial
+
+import pandas as pd
+
+from app.providers.base import (
+    MarketDataProvider,
+    empty_bars,
+    normalize_bars,
+    parse_dates,
+    slice_period,
+    slice_range,
+)
+
+
+class LocalProvider(MarketDataProvider):
+    """Serves market data from snapshot files in a directory.
+
+    Layout, one set of files per ticker (upper-case symbol)::
+
+        AAPL.1d.parquet   or  AAPL.1d.csv   (``AAPL.parquet``/``AAPL.csv`` for 1d)
+        AAPL.1wk.csv      other intervals, same columns
+        AAPL.info.json    {"info": {...}, "recommendations": [...], "price_targets": {...}}
+
+    Bar files need a ``Date`` column plus Open/High/Low/Close/Volume. Each
+    snapshot holds the full history; requested periods are sliced from it.
+    Intraday CSV timestamps with UTC offsets are shown in the info's
+    ``exchangeTimezoneName`` (UTC without one). Parquet files need
+    ``pyarrow`` installed.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files: dict[str, tuple[float, object]] = {}
+
+    def _load(self, path: str, reader):
+        # Re-read a snapshot only when its mtime changes
+        mtime = os.path.getmtime(path)
+        cached = self._files.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        value = reader(path)
+        self._files[path] = (mtime, value)
+        return value
+
+    def _bars_path(self, ticker: str, interval: str) -> str | None:
+        stems = [f"{ticker}.{interval}"]
+        if interval == "1d":
+            stems.append(ticker)
+        for stem in stems:
+            for ext in ("parquet", "csv"):
+                path = os.path.join(self.directory, f"{stem}.{ext}")
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _info_file(self, ticker: str) -> dict:
+        path = os.path.join(self.directory, f"{ticker.upper()}.info.json")
+        if not os.path.exists(path):
+            return {}
+        return self._load(path, _read_json)
+
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        path = self._bars_path(ticker.upper(), interval)
+        if path is None:
+            return empty_bars()
+        tz = self._info_file(ticker).get("info", {}).get("exchangeTimezoneName")
+        data = self._load(path, partial(_read_bars, tz=tz))
+        if start is not None or end is not None:
+            return slice_range(data, start, end).copy()
+        return slice_period(data, period).copy()
+
+    def info(self, ticker: str) -> dict:
+        return dict(self._info_file(ticker).get("info") or {})
+
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        records = self._info_file(ticker).get("recommendations")
+        if not records:
+            return None
+        return pd.DataFrame(records)
+
+    def price_targets(self, ticker: str) -> dict | None:
+        return self._info_file(ticker).get("price_targets")
+
+
+def _read_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _read_bars(path: str, tz: str | None = None) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        data = pd.read_parquet(path)
+    else:
+        data = pd.read_csv(path)
+    if "Date" in data.columns:
+        data = data.set_index("Date")
+    data.index = parse_dates(data.index, tz)
+    return normalize_bars(data)
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+
+import pandas as pd
+
+from app.providers.base import MarketDataProvider, empty_bars, normalize_bars, parse_dates
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves responses previously captured by RecordingProvider.
+
+    Each call is keyed on its arguments and stored as one JSON file under
+    ``<directory>/<method>/``. Calls without a recording return the same
+    "no data" values a live upstream would for an unknown ticker.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, method: str, *parts: str) -> str:
+        filename = "__".join(p.replace("/", "_") for p in parts) + ".json"
+        return os.path.join(self.directory, method, filename)
+
+    def _read(self, method: str, *parts: str):
+        path = self._path(method, *parts)
+        if not os.path.exists(path):
+            logger.debug("No recording at %s", path)
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        payload = self._read("bars", *_bars_key(ticker, period, interval, start, end))
+        if not payload:
+            return empty_bars()
+        return _frame_from_json(payload)
+
+    def info(self, ticker: str) -> dict:
+        return self._read("info", ticker.upper()) or {}
+
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        records = self._read("recommendations", ticker.upper())
+        return pd.DataFrame(records) if records else None
+
+    def price_targets(self, ticker: str) -> dict | None:
+        return self._read("price_targets", ticker.upper())
+
+
+class RecordingProvider(ReplayProvider):
+    """Passes calls through to another provider and records each response
+    in the layout ReplayProvider reads."""
+
+    name = "record"
+
+    def __init__(self, inner: MarketDataProvider, directory: str):
+        super().__init__(directory)
+        self.inner = inner
+        self.remote = inner.remote
+
+    def is_transient(self, exc: Exception) -> bool:
+        return self.inner.is_transient(exc)
+
+    def _write(self, payload, method: str, *parts: str):
+        path = self._path(method, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp, path)
+
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        data = self.inner.bars(ticker, period, interval, start=start, end=end)
+        self._write(_frame_to_json(data), "bars", *_bars_key(ticker, period, interval, start, end))
+        return data
+
+    def info(self, ticker: str) -> dict:
+        info = self.inner.info(ticker)
+        self._write(info, "info", ticker.upper())
+        return info
+
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        recs = self.inner.recommendations(ticker)
+        records = recs.to_dict(orient="records") if recs is not None else None
+        self._write(records, "recommendations", ticker.upper())
+        return recs
+
+    def price_targets(self, ticker: str) -> dict | None:
+        targets = self.inner.price_targets(ticker)
+        self._write(targets, "price_targets", ticker.upper())
+        return targets
+
+
+def _bars_key(ticker, period, interval, start, end) -> tuple:
+    if start is not None or end is not None:
+        return ticker.upper(), f"{start or ''}_{end or ''}", interval
+    return ticker.upper(), period, interval
+
+
+def _frame_to_json(data: pd.DataFrame) -> dict:
+    return {
+        "index": [ts.isoformat() for ts in data.index],
+        # Offsets alone lose the zone (and change across DST), so keep its name
+        "tz": str(data.index.tz) if data.index.tz is not None else None,
+        "columns": {col: data[col].tolist() for col in data.columns},
+    }
+
+
+def _frame_from_json(payload: dict) -> pd.DataFrame:
+    index = parse_dates(payload["index"], payload.get("tz"))
+    return normalize_bars(pd.DataFrame(payload["columns"], index=index))
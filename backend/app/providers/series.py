@@ -0,0 +1,181 @@
+"""Compact, array-backed price series for the market-data cache.
+
+A DataFrame of bars costs 8 bytes per value plus per-frame and per-block
+Python overhead, and ``fetch_ohlcv`` used to walk it row by row. A
+``PriceSeries`` keeps one contiguous array per field instead:
+
+- ``timestamps``: int64 nanoseconds since the epoch (UTC for tz-aware data)
+- ``open``/``high``/``low``/``close``: float32, or float64 for series priced
+  above ``FLOAT32_PRICE_LIMIT`` where float32 can no longer hold cents
+- ``volume``: uint64
+
+32 bytes per bar, about 8 KB per ticker-year of daily bars. Period windows
+are array views (no copy), and ``to_records`` serialises straight from the
+arrays.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.providers.base import OHLCV_COLUMNS, PERIOD_OFFSETS
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+# float32 has a 24-bit mantissa: above 2**16 its spacing exceeds half a cent
+FLOAT32_PRICE_LIMIT = 2.0 ** 16
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+class PriceSeries:
+    __slots__ = ("timestamps", "open", "high", "low", "close", "volume", "tz")
+
+    def __init__(self, timestamps, open, high, low, close, volume, tz: str | None = None):
+        self.timestamps = timestamps
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.tz = tz
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "PriceSeries":
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        timestamps = np.ascontiguousarray(index.as_unit("ns").asi8, dtype=np.int64)
+
+        prices = {}
+        for column in PRICE_COLUMNS:
+            if column in data.columns:
+                prices[column] = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                prices[column] = np.full(len(data), np.nan)
+        peak = max((np.nanmax(np.abs(p), initial=0.0) for p in prices.values() if len(p)), default=0.0)
+        dtype = np.float32 if peak < FLOAT32_PRICE_LIMIT else np.float64
+
+        if "Volume" in data.columns:
+            volume = np.nan_to_num(data["Volume"].to_numpy(dtype=np.float64, na_value=0.0))
+        else:
+            volume = np.zeros(len(data))
+        return cls(
+            timestamps,
+            *(np.ascontiguousarray(prices[c], dtype=dtype) for c in PRICE_COLUMNS),
+            volume.astype(np.uint64),
+            tz,
+        )
+
+    def to_bytes(self) -> bytes:
+        """Compact binary form (JSON header line + raw arrays) for the
+        cross-process shared store."""
+        header = {"n": len(self), "price": self.close.dtype.str, "tz": self.tz}
+        arrays = (self.timestamps, self.open, self.high, self.low, self.close, self.volume)
+        return json.dumps(header).encode() + b"\n" + b"".join(a.tobytes() for a in arrays)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "PriceSeries":
+        """Inverse of ``to_bytes``; the arrays are read-only views on ``payload``."""
+        head, _, body = payload.partition(b"\n")
+        header = json.loads(head)
+        n, price = header["n"], np.dtype(header["price"])
+        arrays, offset = [], 0
+        for dtype in (np.dtype(np.int64), price, price, price, price, np.dtype(np.uint64)):
+            arrays.append(np.frombuffer(body, dtype=dtype, count=n, offset=offset))
+            offset += n * dtype.itemsize
+        return cls(*arrays, header["tz"])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.timestamps, self.open, self.high, self.low, self.close, self.volume))
+
+    def index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name="Date")
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return index
+
+    def to_frame(self) -> pd.DataFrame:
+        """A new float64 DataFrame; callers may modify it freely."""
+        return pd.DataFrame(
+            {
+                "Open": self.open.astype(np.float64),
+                "High": self.high.astype(np.float64),
+                "Low": self.low.astype(np.float64),
+                "Close": self.close.astype(np.float64),
+                "Volume": self.volume.astype(np.int64),
+            },
+            index=self.index(),
+            columns=OHLCV_COLUMNS,
+        )
+
+    def __getitem__(self, key: slice) -> "PriceSeries":
+        return PriceSeries(
+            self.timestamps[key], self.open[key], self.high[key], self.low[key],
+            self.close[key], self.volume[key], self.tz,
+        )
+
+    def _timestamp(self, ns: int) -> pd.Timestamp:
+        ts = pd.Timestamp(ns, unit="ns")
+        return ts.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else ts
+
+    def _local_days(self) -> np.ndarray:
+        if self.tz is None:
+            return self.timestamps // NS_PER_DAY
+        return self.index().tz_localize(None).asi8 // NS_PER_DAY
+
+    def slice_period(self, period: str | None) -> "PriceSeries":
+        """Trailing ``period`` as views on the same arrays; same rules as
+        ``base.slice_period``."""
+        if self.empty or period in ("max", None):
+            return self
+
+        last = self._timestamp(int(self.timestamps[-1]))
+        if period == "ytd":
+            cutoff = last.normalize().replace(month=1, day=1)
+            return self[np.searchsorted(self.timestamps, cutoff.value, side="left"):]
+        if period.endswith("d"):
+            days = self._local_days()
+            first = np.unique(days)[-int(period[:-1]):][0]
+            return self[np.searchsorted(days, first, side="left"):]
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None:
+            raise ValueError(f"Unsupported period '{period}'")
+        return self[np.searchsorted(self.timestamps, (last - offset).value, side="right"):]
+
+    def _iso_dates(self) -> list[str]:
+        if self.tz is None:
+            return np.datetime_as_string(self.timestamps.view("datetime64[ns]"), unit="s").tolist()
+        local = self.index().tz_localize(None).asi8
+        offsets = (local - self.timestamps) // 10 ** 9
+        names = {}
+        for seconds in np.unique(offsets).tolist():
+            sign = "+" if seconds >= 0 else "-"
+            hours, minutes = divmod(abs(seconds) // 60, 60)
+            names[seconds] = f"{sign}{hours:02d}:{minutes:02d}"
+        stamps = np.datetime_as_string(local.view("datetime64[ns]"), unit="s").tolist()
+        return [s + names[o] for s, o in zip(stamps, offsets.tolist())]
+
+    def to_records(self, sma_windows: tuple[int, ...] = ()) -> list[dict]:
+        """Bars as ``fetch_ohlcv`` records (prices rounded to cents), with a
+        simple moving average of Close per window."""
+        close = self.close.astype(np.float64)
+        columns = {
+            "Date": self._iso_dates(),
+            "Open": np.round(self.open.astype(np.float64), 2).tolist(),
+            "High": np.round(self.high.astype(np.float64), 2).tolist(),
+            "Low": np.round(self.low.astype(np.float64), 2).tolist(),
+            "Close": np.round(close, 2).tolist(),
+            "Volume": self.volume.tolist(),
+        }
+        for window in sma_windows:
+            sma = np.round(pd.Series(close).rolling(window=window).mean().to_numpy(), 2)
+            columns[f"SMA_{window}"] = [None if v != v else v for v in sma.tolist()]
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
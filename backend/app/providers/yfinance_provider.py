@@ -0,0 +1,96 @@
+import os
+
+import requests
+import yfinance as yf
+import pandas as pd
+from curl_cffi.requests.exceptions import RequestException as CurlRequestException
+from yfinance.exceptions import (
+    YFInvalidPeriodError,
+    YFPricesMissingError,
+    YFRateLimitError,
+    YFTickerMissingError,
+)
+
+from app.providers.base import (
+    EARLIEST_START,
+    InvalidRequest,
+    MarketDataProvider,
+    check_bar_request,
+    empty_bars,
+    normalize_bars,
+)
+from app.resilience import time_left
+
+DAILY_OR_COARSER = {"1d", "5d", "1wk", "1mo", "3mo"}
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    YFRateLimitError,
+    requests.RequestException,
+    CurlRequestException,
+)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance data via the yfinance package.
+
+    Network and throttling errors are raised (rather than returned as an
+    empty frame, which is what ``yf.download`` does) so the guard layer can
+    tell "unknown ticker" apart from "upstream down". Arguments yfinance
+    rejects raise InvalidRequest.
+    """
+
+    name = "yfinance"
+    remote = True
+
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout if timeout is not None else float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+
+    def is_transient(self, exc: Exception) -> bool:
+        return isinstance(exc, TRANSIENT_ERRORS)
+
+    def _timeout(self) -> float:
+        left = time_left()
+        return self.timeout if left is None else min(self.timeout, max(left, 0.1))
+
+    def bars(
+        self,
+        ticker: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        ranged = start is not None or end is not None
+        check_bar_request(None if ranged else period, interval)
+        if ranged:
+            # Without a start, yfinance would combine end with its default period
+            window = {"start": start or EARLIEST_START, "end": end}
+        else:
+            window = {"period": period}
+        try:
+            data = yf.Ticker(ticker).history(
+                **window,
+                interval=interval,
+                auto_adjust=True,
+                raise_errors=True,
+                timeout=self._timeout(),
+            )
+        except (YFTickerMissingError, YFPricesMissingError):
+            return empty_bars()
+        except YFInvalidPeriodError as exc:
+            # e.g. 1m bars for a 1y period
+            raise InvalidRequest(str(exc)) from exc
+        # Match yf.download: daily and coarser bars carry naive dates
+        if interval in DAILY_OR_COARSER and getattr(data.index, "tz", None) is not None:
+            data.index = data.index.tz_localize(None)
+        return normalize_bars(data)
+
+    def info(self, ticker: str) -> dict:
+        return yf.Ticker(ticker).info or {}
+
+    def recommendations(self, ticker: str) -> pd.DataFrame | None:
+        return yf.Ticker(ticker).recommendations
+
+    def price_targets(self, ticker: str) -> dict | None:
+        return yf.Ticker(ticker).analyst_price_targets
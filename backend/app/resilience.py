@@ -0,0 +1,192 @@
+"""Upstream protection primitives: a token-bucket rate limiter, a circuit
+breaker, per-request staleness tracking for stale-while-revalidate,
+per-request deadlines and a background scope for jobs limited to spare
+upstream capacity."""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when an upstream call cannot be made or failed and no cached
+    fallback exists. Routes turn this into a 503 with Retry-After."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """The request's deadline passed before the upstream answered."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens/second, bursts up to
+    ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """Take a token if one is available beyond ``reserve``; otherwise
+        return the seconds until there is (0.0 means a token was taken)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return 0.0
+            return (1 + reserve - self._tokens) / self.rate
+
+    def acquire(self, timeout: float, reserve: float = 0.0) -> bool:
+        """Wait up to ``timeout`` seconds for a token, leaving ``reserve``
+        tokens in the bucket for other callers."""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(reserve)
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and rejects
+    calls for ``reset_timeout`` seconds, then lets a single trial call through
+    (half-open). A successful trial closes it again."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if now - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call that said nothing about upstream health (e.g. rejected
+        arguments): frees the half-open trial slot without changing state."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+_staleness: ContextVar[list | None] = ContextVar("staleness", default=None)
+
+
+@contextmanager
+def staleness_scope():
+    """Collect the age (seconds) of every stale value served inside the block.
+
+    Yields a list; it is empty when everything came from the upstream or a
+    fresh cache entry.
+    """
+    ages: list[float] = []
+    token = _staleness.set(ages)
+    try:
+        yield ages
+    finally:
+        _staleness.reset(token)
+
+
+def note_stale(age: float):
+    ages = _staleness.get()
+    if ages is not None:
+        ages.append(age)
+
+
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """Give upstream calls made inside the block ``seconds`` in total
+    (``None``: no deadline)."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """Seconds until the current request's deadline (never negative), or
+    ``None`` outside a deadline scope."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+_background: ContextVar[float | None] = ContextVar("background", default=None)
+
+
+@contextmanager
+def background_scope(max_wait: float):
+    """Mark upstream calls made inside the block as background work: they
+    only take a rate-limit token while the bucket is otherwise full, waiting
+    up to ``max_wait`` seconds for one, so user requests keep the burst."""
+    token = _background.set(max_wait)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def background_wait() -> float | None:
+    """The current background scope's token wait, or ``None`` outside one."""
+    return _background.get()
@@ -0,0 +1,221 @@
+"""Cross-asset risk statistics over an aligned returns panel.
+
+All statistics are computed with NumPy on a ``(T, N)`` matrix of log
+returns: one covariance product for the correlation/covariance matrices,
+cumulative sums for rolling betas, and a single linear solve for the
+minimum-variance allocation.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.bar_cache import get_bars
+from app.resilience import UpstreamUnavailable
+
+RISK_MAX_TICKERS = int(os.getenv("RISK_MAX_TICKERS", "500"))
+RISK_SHRINKAGE = float(os.getenv("RISK_SHRINKAGE", "0.1"))
+RISK_PANEL_TTL = int(os.getenv("RISK_PANEL_TTL", "60"))
+MIN_COVERAGE = 0.8
+PERIODS_PER_YEAR = {"1d": 252, "1wk": 52, "1mo": 12}
+
+_panels: "OrderedDict[tuple, tuple[float, pd.DataFrame, list[str]]]" = OrderedDict()
+_panels_lock = threading.Lock()
+_PANEL_CACHE_SIZE = 16
+
+
+def _closes(ticker: str, period: str, interval: str) -> pd.Series | None:
+    try:
+        bars = get_bars(ticker, period, interval)
+    except UpstreamUnavailable:
+        return None
+    if bars.empty:
+        return None
+    return bars["Close"].rename(ticker.upper())
+
+
+def build_returns_panel(tickers: list[str], period: str, interval: str) -> tuple[pd.DataFrame, list[str]]:
+    """Aligned log returns for ``tickers`` plus the symbols that were dropped.
+
+    Symbols without data, or covering under 80% of the panel's dates, are
+    dropped; the remaining rows with any gap are removed.
+    """
+    key = (tuple(tickers), period, interval)
+    with _panels_lock:
+        cached = _panels.get(key)
+        if cached and time.monotonic() - cached[0] < RISK_PANEL_TTL:
+            _panels.move_to_end(key)
+            return cached[1], cached[2]
+
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="risk") as pool:
+        # Run in the caller's context so deadline and staleness tracking apply
+        futures = [
+            pool.submit(contextvars.copy_context().run, _closes, t, period, interval) for t in tickers
+        ]
+        series = [future.result() for future in futures]
+    available = [s for s in series if s is not None]
+    dropped = [t for t, s in zip(tickers, series) if s is None]
+    if not available:
+        return pd.DataFrame(), dropped
+
+    prices = pd.concat(available, axis=1).sort_index()
+    coverage = prices.notna().mean()
+    sparse = list(coverage[coverage < MIN_COVERAGE].index)
+    dropped += sparse
+    prices = prices.drop(columns=sparse).dropna()
+    returns = np.log(prices).diff().iloc[1:]
+
+    with _panels_lock:
+        _panels[key] = (time.monotonic(), returns, dropped)
+        _panels.move_to_end(key)
+        while len(_panels) > _PANEL_CACHE_SIZE:
+            _panels.popitem(last=False)
+    return returns, dropped
+
+
+def covariance(returns: np.ndarray) -> np.ndarray:
+    centered = returns - returns.mean(axis=0)
+    return centered.T @ centered / (len(returns) - 1)
+
+
+def correlation(cov: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+    return np.clip(np.nan_to_num(corr), -1.0, 1.0)
+
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int) -> np.ndarray:
+    """Rolling OLS beta of every column against ``benchmark``, shape
+    ``(T - window + 1, N)``, from windowed sums of cumulative sums."""
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return cumulative[window:] - cumulative[:-window]
+
+    b = benchmark.reshape(-1, 1)
+    sum_x = window_sums(b)
+    sum_xx = window_sums(b * b)
+    sum_y = window_sums(returns)
+    sum_xy = window_sums(returns * b)
+    variance = window * sum_xx - sum_x * sum_x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (window * sum_xy - sum_x * sum_y) / variance
+
+
+def min_variance_weights(cov: np.ndarray, shrinkage: float = RISK_SHRINKAGE) -> np.ndarray:
+    """Unconstrained (shorts allowed) minimum-variance weights summing to 1.
+
+    The covariance is shrunk toward its diagonal so the solve stays well
+    conditioned when there are more assets than observations.
+    """
+    shrunk = (1 - shrinkage) * cov + shrinkage * np.diag(np.diag(cov))
+    ones = np.ones(len(cov))
+    raw = np.linalg.solve(shrunk, ones)
+    return raw / raw.sum()
+
+
+def _round_matrix(matrix: np.ndarray, digits: int = 6) -> list[list[float]]:
+    return np.round(matrix, digits).tolist()
+
+
+def compute_risk(
+    returns: pd.DataFrame,
+    weights: dict[str, float] | None = None,
+    benchmark: pd.Series | None = None,
+    window: int = 60,
+    periods_per_year: int = 252,
+    include_matrices: bool = True,
+) -> dict:
+    """Risk statistics for the columns of ``returns`` (log returns, one
+    column per ticker). ``weights`` default to equal weight."""
+    tickers = list(returns.columns)
+    panel = returns.to_numpy()
+    cov = covariance(panel) * periods_per_year
+    vol = np.sqrt(np.diag(cov))
+
+    if weights:
+        w = np.array([weights.get(t, 0.0) for t in tickers])
+    else:
+        w = np.full(len(tickers), 1 / len(tickers))
+    portfolio = {
+        "weights": dict(zip(tickers, np.round(w, 6).tolist())),
+        "volatility": round(float(np.sqrt(w @ cov @ w)), 6),
+    }
+
+    mv = min_variance_weights(cov)
+    result = {
+        "tickers": tickers,
+        "observations": len(panel),
+        "periodsPerYear": periods_per_year,
+        "volatility": dict(zip(tickers, np.round(vol, 6).tolist())),
+        "portfolio": portfolio,
+        "minVariance": {
+            "weights": dict(zip(tickers, np.round(mv, 6).tolist())),
+            "volatility": round(float(np.sqrt(mv @ cov @ mv)), 6),
+        },
+    }
+    if include_matrices:
+        result["covariance"] = _round_matrix(cov)
+        result["correlation"] = _round_matrix(correlation(cov), 4)
+
+    if benchmark is not None and len(panel) >= window:
+        # Last column is the portfolio itself
+        betas = rolling_beta(np.column_stack([panel, panel @ w]), benchmark.to_numpy(), window)
+        latest = np.nan_to_num(betas[-1])
+        result["benchmark"] = benchmark.name
+        result["beta"] = dict(zip(tickers, np.round(latest[:-1], 4).tolist()))
+        portfolio["beta"] = round(float(latest[-1]), 4)
+        result["rollingBeta"] = {
+            "window": window,
+            "dates": [ts.isoformat() for ts in returns.index[window - 1:]],
+            "portfolio": np.round(np.nan_to_num(betas[:, -1]), 4).tolist(),
+        }
+    return result
+
+
+def fetch_risk(
+    tickers: list[str],
+    weights: list[float] | None = None,
+    benchmark: str | None = "SPY",
+    period: str = "1y",
+    interval: str = "1d",
+    window: int = 60,
+    include_matrices: bool = True,
+) -> dict | None:
+    if interval not in PERIODS_PER_YEAR:
+        raise ValueError(f"interval must be one of {', '.join(PERIODS_PER_YEAR)}")
+    if weights is not None and len(weights) != len(tickers):
+        raise ValueError("weights must have one entry per ticker")
+
+    symbols = tickers + [benchmark] if benchmark and benchmark not in tickers else list(tickers)
+    returns, dropped = build_returns_panel(symbols, period, interval)
+    usable = [t for t in tickers if t in returns.columns]
+    if not usable or len(returns) < 2:
+        return None
+
+    weight_map = None
+    if weights is not None:
+        weight_map = {t: w for t, w in zip(tickers, weights) if t in returns.columns}
+        total = sum(weight_map.values())
+        if total == 0:
+            raise ValueError("weights of available tickers sum to zero")
+        weight_map = {t: w / total for t, w in weight_map.items()}
+
+    result = compute_risk(
+        returns[usable],
+        weights=weight_map,
+        benchmark=returns[benchmark] if benchmark in returns.columns else None,
+        window=window,
+        periods_per_year=PERIODS_PER_YEAR[interval],
+        include_matrices=include_matrices,
+    )
+    result["dropped"] = [t for t in dropped if t in tickers]
+    result["period"] = period
+    result["interval"] = interval
+    return result
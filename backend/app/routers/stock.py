@@ -1,69 +1,271 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.auth_utils import get_current_user
+from app.export_utils import EXPORT_MAX_TICKERS, MEDIA_TYPES, STREAMERS
+from app import metrics, popularity, screener
+from app.providers import get_provider
+from app.providers.base import InvalidRequest, check_bar_request
 from app.stock_utils import fetch_ohlcv, fetch_ticker_info
 from app.claude_insights import get_insights
-from app.forecast_utils import fetch_forecast
+from app.forecast_utils import MODEL_CHOICES, fetch_forecast
+from app.risk_utils import RISK_MAX_TICKERS, fetch_risk
+from app.backtest_utils import BACKTEST_MAX_HORIZON, BACKTEST_MAX_ORIGINS, fetch_backtest
+from app.resilience import staleness_scope
 
 router = APIRouter()
 
 
+def _mark_stale(response: Response, ages: list[float]):
+    """Flag responses built from cached upstream data past its TTL."""
+    if ages:
+        response.headers["X-Data-Stale"] = "true"
+        response.headers["X-Data-Age"] = str(int(max(ages)))
+
+
+def _check_bars(period: str | None, interval: str = "1d"):
+    """Reject unknown periods/intervals before they reach the upstream."""
+    try:
+        check_bar_request(period, interval)
+    except InvalidRequest as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _parse_tickers(tickers: str, limit: int) -> list[str]:
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No tickers given")
+    if len(symbols) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} tickers per request")
+    return symbols
+
+
+# Fixed paths must be registered before "/{ticker}" or they are captured by it
+@router.get("/export")
+def export_bars(
+    tickers: str,
+    start: date | None = None,
+    end: date | None = None,
+    interval: str = "1d",
+    format: str = "csv",
+    _user: str = Depends(get_current_user),
+):
+    if format not in STREAMERS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {', '.join(STREAMERS)}"
+        )
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # Validate before the 200 goes out; nothing can be rejected mid-stream
+    _check_bars(None, interval)
+    symbols = _parse_tickers(tickers, EXPORT_MAX_TICKERS)
+    stream = STREAMERS[format](
+        symbols,
+        start.isoformat() if start else None,
+        end.isoformat() if end else None,
+        interval,
+    )
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="bars-{interval}.{extension}"'},
+    )
+
+
+@router.get("/screener")
+def screen_stocks(
+    filter: list[str] = Query(default=[]),
+    sort: str | None = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    fields: str | None = None,
+    _user: str = Depends(get_current_user),
+):
+    index = screener.get_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Screener index is still building")
+    descending = bool(sort) and sort.startswith("-")
+    try:
+        return index.query(
+            filters=[screener.parse_filter(f) for f in filter],
+            sort=sort.lstrip("-") if sort else None,
+            descending=descending,
+            offset=offset,
+            limit=limit,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/screener/fields")
+def screener_fields(_user: str = Depends(get_current_user)):
+    index = screener.get_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Screener index is still building")
+    return {"numeric": sorted(index.numeric), "text": sorted(index.text), "symbols": len(index)}
+
+
+@router.get("/risk")
+def get_risk(
+    tickers: str,
+    weights: str | None = None,
+    benchmark: str | None = "SPY",
+    period: str = "1y",
+    interval: str = "1d",
+    window: int = Query(default=60, ge=5, le=500),
+    matrices: bool = True,
+    _user: str = Depends(get_current_user),
+):
+    _check_bars(period, interval)
+    symbols = _parse_tickers(tickers, RISK_MAX_TICKERS)
+    weight_list = None
+    if weights:
+        try:
+            weight_list = [float(w) for w in weights.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="weights must be comma-separated numbers")
+    with staleness_scope() as stale:
+        try:
+            result = fetch_risk(
+                symbols,
+                weights=weight_list,
+                benchmark=benchmark.upper() if benchmark else None,
+                period=period,
+                interval=interval,
+                window=window,
+                include_matrices=matrices,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="No overlapping price history for these tickers")
+    # Large matrices: skip jsonable_encoder, the payload is already plain lists
+    response = JSONResponse(content=result)
+    _mark_stale(response, stale)
+    return response
+
+
+@router.get("/cache/stats")
+def cache_stats(
+    top: int = Query(default=25, ge=1, le=500),
+    _user: str = Depends(get_current_user),
+):
+    hot = popularity.counter.top(top)
+    latency = metrics.snapshot([ticker for ticker, _ in hot])
+    provider = get_provider()
+    return {
+        "cache": provider.cache_usage() if hasattr(provider, "cache_usage") else None,
+        "prefetchEnabled": popularity.prefetch_enabled(),
+        "prefetch": dict(popularity.prefetch_stats),
+        "overall": latency.get("_all"),
+        "hot": [
+            {"ticker": ticker, "score": round(score, 3), **latency.get(ticker, {})}
+            for ticker, score in hot
+        ],
+    }
+
+
 @router.get("/{ticker}")
 def get_stock(
     ticker: str,
+    response: Response,
     period: str = "1y",
     interval: str = "1d",
     _user: str = Depends(get_current_user),
 ):
-    data = fetch_ohlcv(ticker, period, interval)
+    _check_bars(period, interval)
+    with staleness_scope() as stale:
+        data = fetch_ohlcv(ticker, period, interval)
     if not data:
         raise HTTPException(
             status_code=404, detail=f"No data found for ticker '{ticker}'"
         )
+    _mark_stale(response, stale)
     return data
 
 
 @router.get("/{ticker}/info")
 def get_stock_info(
     ticker: str,
+    response: Response,
     _user: str = Depends(get_current_user),
 ):
-    info = fetch_ticker_info(ticker)
+    with staleness_scope() as stale:
+        info = fetch_ticker_info(ticker)
     if not info:
         raise HTTPException(
             status_code=404, detail=f"No info found for ticker '{ticker}'"
         )
+    _mark_stale(response, stale)
     return info
 
 
 @router.get("/{ticker}/insights")
 def get_stock_insights(
     ticker: str,
+    response: Response,
     _user: str = Depends(get_current_user),
 ):
-    info = fetch_ticker_info(ticker)
-    if not info:
-        raise HTTPException(
-            status_code=404, detail=f"No info found for ticker '{ticker}'"
-        )
-    insights = get_insights(info, ticker)
+    with staleness_scope() as stale:
+        info = fetch_ticker_info(ticker)
+        if not info:
+            raise HTTPException(
+                status_code=404, detail=f"No info found for ticker '{ticker}'"
+            )
+        # Served stale from the cache if the model call misses the deadline
+        insights = get_insights(info, ticker)
     if not insights:
         raise HTTPException(
             status_code=503, detail="AI insights unavailable"
         )
+    _mark_stale(response, stale)
     return insights
 
 
 @router.get("/{ticker}/forecast")
 def get_stock_forecast(
     ticker: str,
+    response: Response,
     days: int = 7,
     period: str = "1y",
+    model: str = "arima",
+    budget_ms: int | None = Query(default=None, ge=1, le=60000),
     _user: str = Depends(get_current_user),
 ):
-    result = fetch_forecast(ticker, period, days)
+    if model not in MODEL_CHOICES:
+        raise HTTPException(
+            status_code=400, detail=f"model must be one of {', '.join(MODEL_CHOICES)}"
+        )
+    _check_bars(period)
+    with staleness_scope() as stale:
+        result = fetch_forecast(ticker, period, days, model, budget_ms)
     if not result.get("forecast"):
         raise HTTPException(
             status_code=404, detail=f"No forecast data for ticker '{ticker}'"
         )
+    _mark_stale(response, stale)
+    return result
+
+
+@router.get("/{ticker}/forecast/backtest")
+def get_stock_forecast_backtest(
+    ticker: str,
+    response: Response,
+    period: str = "2y",
+    origins: int = Query(default=250, ge=1, le=BACKTEST_MAX_ORIGINS),
+    horizon: int = Query(default=7, ge=1, le=BACKTEST_MAX_HORIZON),
+    _user: str = Depends(get_current_user),
+):
+    _check_bars(period)
+    with staleness_scope() as stale:
+        result = fetch_backtest(ticker, period, origins, horizon)
+    if not result.get("backtest"):
+        raise HTTPException(
+            status_code=404, detail=f"Not enough history to backtest '{ticker}'"
+        )
+    _mark_stale(response, stale)
     return result
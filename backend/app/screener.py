@@ -0,0 +1,324 @@
+"""Fundamentals screener over a precomputed columnar index.
+
+A background thread periodically runs ``fetch_ticker_info`` for every symbol
+in the configured universe and builds a ScreenerIndex: one NumPy column per
+field plus a pre-sorted order per field. Queries are then answered without
+touching the upstream: range filters are ``searchsorted`` lookups on the
+sorted columns and sorting reuses the stored order.
+
+With several worker processes (shared_store enabled) one worker holds the
+refresh lease and publishes its rows; the others load them from the store.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app import shared_store
+from app.resilience import UpstreamUnavailable, background_scope
+from app.stock_utils import fetch_ticker_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNIVERSE = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "BRK-B", "JPM", "V",
+    "UNH", "XOM", "JNJ", "PG", "MA", "HD", "CVX", "MRK", "ABBV", "KO",
+    "PEP", "COST", "AVGO", "WMT", "MCD", "CSCO", "ORCL", "CRM", "BAC", "NFLX",
+]
+SCREENER_REFRESH_INTERVAL = int(os.getenv("SCREENER_REFRESH_INTERVAL", "3600"))
+SCREENER_WORKERS = int(os.getenv("SCREENER_WORKERS", "4"))
+# How often non-leader workers check the shared store for a newer index
+SCREENER_SYNC_INTERVAL = int(os.getenv("SCREENER_SYNC_INTERVAL", "30"))
+# Seconds a refresh waits for spare upstream capacity per call before
+# keeping the symbol's previous row
+SCREENER_MAX_WAIT = float(os.getenv("SCREENER_MAX_WAIT", "30"))
+SHARED_ROWS_KEY = "screener:rows"
+DEFAULT_FIELDS = ["longName", "sector", "currentPrice", "marketCap", "trailingPE"]
+OPERATORS = ("<=", ">=", "==", "!=", "<", ">")
+
+_index: "ScreenerIndex | None" = None
+_rows: dict[str, dict] = {}
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def screener_enabled() -> bool:
+    return os.getenv("SCREENER_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def load_universe() -> list[str]:
+    path = os.getenv("SCREENER_UNIVERSE_FILE")
+    if path:
+        with open(path) as f:
+            symbols = [line.strip() for line in f]
+    elif os.getenv("SCREENER_UNIVERSE"):
+        symbols = os.getenv("SCREENER_UNIVERSE").split(",")
+    else:
+        symbols = DEFAULT_UNIVERSE
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+
+def flatten_info(info: dict) -> dict:
+    """Flatten fetch_ticker_info output into one field per scalar.
+
+    Section leaves keep their own names (``trailingPE``, ``sector``); nested
+    analyst dicts are dotted (``priceTargets.mean``, ``recommendations.buy``).
+    """
+    row = {}
+    for section in info.values():
+        if not isinstance(section, dict):
+            continue
+        for key, value in section.items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    row[f"{key}.{sub_key}"] = sub_value
+            else:
+                row[key] = value
+    return row
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ScreenerIndex:
+    """Immutable columnar snapshot of the universe's fundamentals."""
+
+    def __init__(self, rows: dict[str, dict], built_at: float | None = None):
+        self.built_at = built_at or time.time()
+        self.symbols = np.array(sorted(rows), dtype=object)
+        self.numeric: dict[str, np.ndarray] = {}
+        self.text: dict[str, np.ndarray] = {}
+        self._text_lower: dict[str, np.ndarray] = {}
+        self._text_present: dict[str, np.ndarray] = {}
+        self._order: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        self._valid: dict[str, int] = {}
+
+        fields = sorted({field for row in rows.values() for field in row})
+        for field in fields:
+            values = [rows[s].get(field) for s in self.symbols]
+            present = [v for v in values if v is not None]
+            if present and all(_is_number(v) for v in present):
+                column = np.array([np.nan if v is None else float(v) for v in values])
+                order = np.argsort(column, kind="stable")  # NaN sorts last
+                self.numeric[field] = column
+                self._sorted[field] = column[order]
+                self._valid[field] = int(np.count_nonzero(~np.isnan(column)))
+            else:
+                column = np.array([None if v is None else str(v) for v in values], dtype=object)
+                lower = np.array([None if v is None else v.lower() for v in column], dtype=object)
+                keys = [(v is None, v or "") for v in lower]
+                order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64)
+                self.text[field] = column
+                self._text_lower[field] = lower
+                self._text_present[field] = np.array([v is not None for v in column], dtype=bool)
+                self._valid[field] = sum(v is not None for v in column)
+            self._order[field] = order
+
+    @property
+    def fields(self) -> list[str]:
+        return sorted([*self.numeric, *self.text])
+
+    def has_field(self, field: str) -> bool:
+        return field in self.numeric or field in self.text
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _numeric_mask(self, field: str, op: str, value: float) -> np.ndarray:
+        sorted_values = self._sorted[field]
+        order = self._order[field]
+        valid = self._valid[field]
+        left = int(np.searchsorted(sorted_values[:valid], value, side="left"))
+        right = int(np.searchsorted(sorted_values[:valid], value, side="right"))
+        ranges = {
+            "<": [(0, left)],
+            "<=": [(0, right)],
+            ">": [(right, valid)],
+            ">=": [(left, valid)],
+            "==": [(left, right)],
+            "!=": [(0, left), (right, valid)],
+        }[op]
+        mask = np.zeros(len(self.symbols), dtype=bool)
+        for lo, hi in ranges:
+            mask[order[lo:hi]] = True
+        return mask
+
+    def _text_mask(self, field: str, op: str, value: str) -> np.ndarray:
+        if op not in ("==", "!="):
+            raise ValueError(f"Field '{field}' only supports == and !=")
+        lower = self._text_lower[field]
+        matches = lower == value.lower()
+        if op == "==":
+            return matches
+        return ~matches & self._text_present[field]
+
+    def query(
+        self,
+        filters: list[tuple[str, str, str]],
+        sort: str | None = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 50,
+        fields: list[str] | None = None,
+    ) -> dict:
+        mask = np.ones(len(self.symbols), dtype=bool)
+        for field, op, raw in filters:
+            if field in self.numeric:
+                try:
+                    value = float(raw)
+                except ValueError:
+                    raise ValueError(f"Field '{field}' needs a numeric value, got '{raw}'")
+                mask &= self._numeric_mask(field, op, value)
+            elif field in self.text:
+                mask &= self._text_mask(field, op, raw)
+            else:
+                raise ValueError(f"Unknown field '{field}'")
+
+        if sort is None:
+            order = np.arange(len(self.symbols))
+            valid_count = len(order)
+        elif sort in self._order:
+            order = self._order[sort]
+            valid_count = self._valid[sort]
+        else:
+            raise ValueError(f"Unknown sort field '{sort}'")
+
+        # Matching rows in sort order; rows missing the sort field stay last
+        valid = order[:valid_count]
+        ranked = valid[mask[valid]]
+        if descending:
+            ranked = ranked[::-1]
+        missing = order[valid_count:]
+        ranked = np.concatenate([ranked, missing[mask[missing]]])
+
+        if fields:
+            unknown = [f for f in fields if not self.has_field(f)]
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+            projection = fields
+        else:
+            projection = [f for f in DEFAULT_FIELDS if self.has_field(f)]
+
+        page = ranked[offset:offset + limit]
+        results = []
+        for i in page:
+            row = {"symbol": self.symbols[i]}
+            for field in projection:
+                if field in self.numeric:
+                    value = float(self.numeric[field][i])
+                    row[field] = None if math.isnan(value) else value
+                else:
+                    row[field] = self.text[field][i]
+            results.append(row)
+
+        return {
+            "total": int(len(ranked)),
+            "offset": offset,
+            "limit": limit,
+            "asOf": self.built_at,
+            "results": results,
+        }
+
+
+def parse_filter(expression: str) -> tuple[str, str, str]:
+    """Split ``trailingPE<20`` / ``sector==Technology`` into (field, op, value)."""
+    for op in OPERATORS:
+        field, sep, value = expression.partition(op)
+        if sep and field.strip() and value.strip():
+            return field.strip(), op, value.strip()
+    raise ValueError(f"Invalid filter '{expression}', expected <field><op><value>")
+
+
+def _fetch_row(symbol: str) -> dict | None:
+    try:
+        # Spare capacity only: the refresh must not crowd out user requests
+        with background_scope(SCREENER_MAX_WAIT):
+            info = fetch_ticker_info(symbol)
+    except UpstreamUnavailable:
+        logger.warning("Screener refresh skipped %s: upstream unavailable", symbol)
+        return None
+    return flatten_info(info) if info else {}
+
+
+def refresh(universe: list[str] | None = None) -> "ScreenerIndex":
+    """Rebuild the index and swap it in.
+
+    Symbols that fail this round keep their previous row, so an upstream
+    hiccup doesn't empty the screener.
+    """
+    global _index
+    universe = universe or load_universe()
+    with ThreadPoolExecutor(max_workers=SCREENER_WORKERS, thread_name_prefix="screener") as pool:
+        fetched = dict(zip(universe, pool.map(_fetch_row, universe)))
+
+    rows = {}
+    for symbol, row in fetched.items():
+        if row is None:
+            row = _rows.get(symbol)
+        if row:
+            rows[symbol] = row
+    _rows.clear()
+    _rows.update(rows)
+    _index = ScreenerIndex(rows)
+    if shared_store.enabled():
+        shared_store.put(SHARED_ROWS_KEY, json.dumps(rows, default=str).encode(), updated=_index.built_at)
+    logger.info("Screener index rebuilt: %d/%d symbols", len(rows), len(universe))
+    return _index
+
+
+def load_shared() -> "ScreenerIndex | None":
+    """Swap in the rows another worker published, if newer than ours."""
+    global _index
+    found = shared_store.get(SHARED_ROWS_KEY)
+    if found is None or (_index is not None and found[0] <= _index.built_at):
+        return None
+    built_at, payload = found
+    rows = json.loads(payload)
+    _rows.clear()
+    _rows.update(rows)
+    _index = ScreenerIndex(rows, built_at=built_at)
+    return _index
+
+
+def get_index() -> "ScreenerIndex | None":
+    return _index
+
+
+def _refresh_loop():
+    while not _stop.is_set():
+        interval = SCREENER_REFRESH_INTERVAL
+        try:
+            # The lease outlives one interval, so it only moves if its owner dies
+            if not shared_store.enabled() or shared_store.acquire_lease("screener", 2 * SCREENER_REFRESH_INTERVAL):
+                refresh()
+            else:
+                load_shared()
+                interval = min(SCREENER_SYNC_INTERVAL, SCREENER_REFRESH_INTERVAL)
+        except Exception:
+            logger.exception("Screener refresh failed")
+        _stop.wait(interval)
+
+
+def start_refresher() -> threading.Thread | None:
+    global _thread
+    if not screener_enabled() or (_thread and _thread.is_alive()):
+        return None
+    _stop.clear()
+    _thread = threading.Thread(target=_refresh_loop, name="screener-refresh", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop_refresher():
+    _stop.set()
+    if shared_store.enabled():
+        # Let a surviving or replacement worker take over straight away
+        shared_store.release_lease("screener")
@@ -0,0 +1,141 @@
+"""SQLite-backed state shared by every worker process on one instance.
+
+Under gunicorn each worker is a separate process with its own memory, so
+caches and rate limits would otherwise hold per worker. When
+``SHARED_STORE_PATH`` is set (gunicorn.conf.py sets it), workers share
+through one local SQLite file in WAL mode:
+
+- ``get``/``put``: a second-level cache behind the in-process caches;
+- ``SharedTokenBucket``: one upstream rate limit for the whole instance;
+- ``acquire_lease``: elects the single worker that runs a background job.
+
+Connections are opened lazily per thread and per process, so nothing
+opened in the gunicorn parent leaks into forked workers.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from app.resilience import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Where gunicorn.conf.py and command-line jobs put the store by default
+DEFAULT_STORE_PATH = "/tmp/stock-api-shared.db"
+# Entries older than this are pruned (default matches MARKET_DATA_MAX_STALE)
+SHARED_STORE_MAX_AGE = int(os.getenv("SHARED_STORE_MAX_AGE", "86400"))
+PRUNE_EVERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+_local = threading.local()
+_writes = 0
+
+
+def store_path() -> str | None:
+    return os.getenv("SHARED_STORE_PATH") or None
+
+
+def enabled() -> bool:
+    return store_path() is not None
+
+
+def _connect() -> sqlite3.Connection:
+    path = store_path()
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != path:
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), path
+    return conn
+
+
+@contextmanager
+def _transaction():
+    # IMMEDIATE takes the write lock up front, so read-modify-write is atomic
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def get(key: str) -> tuple[float, bytes] | None:
+    """``(updated, value)`` for ``key``; ``updated`` is wall-clock seconds."""
+    row = _connect().execute("SELECT updated, value FROM kv WHERE key = ?", (key,)).fetchone()
+    return (row[0], bytes(row[1])) if row else None
+
+
+def put(key: str, value: bytes, updated: float | None = None):
+    global _writes
+    now = time.time() if updated is None else updated
+    conn = _connect()
+    conn.execute(
+        "INSERT INTO kv (key, value, updated) VALUES (?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+        (key, value, now),
+    )
+    _writes += 1
+    if _writes % PRUNE_EVERY == 0:
+        conn.execute("DELETE FROM kv WHERE updated < ?", (time.time() - SHARED_STORE_MAX_AGE,))
+
+
+def acquire_lease(name: str, ttl: float, owner: str | None = None) -> bool:
+    """Take or renew the ``name`` lease for ``ttl`` seconds. False while
+    another live owner holds it."""
+    owner = owner or str(os.getpid())
+    now = time.time()
+    with _transaction() as conn:
+        row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] != owner and row[1] > now:
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)",
+            (name, owner, now + ttl),
+        )
+    return True
+
+
+def release_lease(name: str, owner: str | None = None):
+    owner = owner or str(os.getpid())
+    with _transaction() as conn:
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in the shared store, so the rate holds
+    across all worker processes."""
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        super().__init__(rate, capacity)
+        self.name = name
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        now = time.time()
+        with _transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            if row is None:
+                tokens = self.capacity
+            else:
+                tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0 if tokens >= 1 + reserve else (1 + reserve - tokens) / self.rate
+            if wait == 0.0:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+        return wait
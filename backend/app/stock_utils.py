@@ -1,44 +1,24 @@
-import yfinance as yf
-import pandas as pd
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app.bar_cache import get_series
+from app.providers import get_provider
+from app.resilience import time_left
+
+SMA_WINDOWS = (20, 50, 200)
+
+# Analyst sections are fetched concurrently and may be dropped on deadline
+_sections = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INFO_SECTION_WORKERS", "8")), thread_name_prefix="info-section"
+)
 
 
 def fetch_ohlcv(ticker: str, period: str = "1y", interval: str = "1d") -> list[dict]:
-    data = yf.download(
-        tickers=ticker,
-        period=period,
-        interval=interval,
-        auto_adjust=True,
-        progress=False,
-    )
-    if data.empty:
+    series = get_series(ticker, period, interval)
+    if series.empty:
         return []
-
-    # yfinance may return MultiIndex columns; flatten them
-    if isinstance(data.columns, pd.MultiIndex):
-        data.columns = data.columns.get_level_values(0)
-
-    # Compute moving averages
-    for window in [20, 50, 200]:
-        data[f"SMA_{window}"] = data["Close"].rolling(window=window).mean()
-
-    data = data.reset_index()
-
-    records = []
-    for _, row in data.iterrows():
-        date_val = row["Date"]
-        record = {
-            "Date": date_val.isoformat() if hasattr(date_val, "isoformat") else str(date_val),
-            "Open": round(float(row["Open"]), 2),
-            "High": round(float(row["High"]), 2),
-            "Low": round(float(row["Low"]), 2),
-            "Close": round(float(row["Close"]), 2),
-            "Volume": int(row["Volume"]),
-        }
-        for window in [20, 50, 200]:
-            val = row[f"SMA_{window}"]
-            record[f"SMA_{window}"] = round(float(val), 2) if pd.notna(val) else None
-        records.append(record)
-    return records
+    return series.to_records(SMA_WINDOWS)
 
 
 def _safe_get(info: dict, key: str, default=None):
@@ -57,17 +37,32 @@ def _safe_round(val, digits=2):
         return None
 
 
+def _submit(fn, *args):
+    # Run in the caller's context so deadline and staleness tracking apply
+    return _sections.submit(contextvars.copy_context().run, fn, *args)
+
+
 def fetch_ticker_info(ticker: str) -> dict:
-    t = yf.Ticker(ticker)
-    info = t.info
+    """Profile, price, ratios and analyst data for ``ticker``.
+
+    The quote info is required. Recommendations and price targets are
+    optional: if one fails or misses the request deadline, its defaults are
+    returned and its name is listed under ``partial``.
+    """
+    provider = get_provider()
+    info = provider.info(ticker)
 
     if not info or info.get("quoteType") is None:
         return {}
 
+    recs_future = _submit(provider.recommendations, ticker)
+    targets_future = _submit(provider.price_targets, ticker)
+    partial = []
+
     # Analyst recommendations (most recent month)
     rec = {"strongBuy": 0, "buy": 0, "hold": 0, "sell": 0, "strongSell": 0}
     try:
-        recs_df = t.recommendations
+        recs_df = recs_future.result(timeout=time_left())
         if recs_df is not None and not recs_df.empty:
             latest = recs_df.iloc[0]
             rec = {
@@ -78,12 +73,12 @@ def fetch_ticker_info(ticker: str) -> dict:
                 "strongSell": int(latest.get("strongSell", 0)),
             }
     except Exception:
-        pass
+        partial.append("analyst.recommendations")
 
     # Analyst price targets
     targets = {"current": None, "low": None, "mean": None, "median": None, "high": None}
     try:
-        apt = t.analyst_price_targets
+        apt = targets_future.result(timeout=time_left())
         if apt:
             targets = {
                 "current": _safe_round(apt.get("current")),
@@ -93,9 +88,9 @@ def fetch_ticker_info(ticker: str) -> dict:
                 "high": _safe_round(apt.get("high")),
             }
     except Exception:
-        pass
+        partial.append("analyst.priceTargets")
 
-    return {
+    result = {
         "profile": {
             "longName": _safe_get(info, "longName", "N/A"),
             "symbol": _safe_get(info, "symbol", ticker.upper()),
@@ -144,3 +139,6 @@ def fetch_ticker_info(ticker: str) -> dict:
             "recommendations": rec,
         },
     }
+    if partial:
+        result["partial"] = partial
+    return result
@@ -0,0 +1,93 @@
+"""Optional start-up warm-up and the readiness flag behind /api/ready.
+
+Heavy dependencies (statsmodels, yfinance, anthropic) are imported lazily so
+the process starts serving quickly. Warm-up pays those costs in the
+background instead of on the first user request: it imports the modules,
+fits a tiny ARIMA model and creates the upstream clients. Until it finishes
+the instance reports not-ready, so a load balancer can hold traffic back.
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = ("yfinance", "anthropic", "pyarrow", "statsmodels.tsa.arima.model")
+
+_ready = threading.Event()
+_state: dict = {"started": None, "finished": None, "error": None}
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> dict:
+    return {"ready": is_ready(), **_state}
+
+
+def _fit_tiny_arima():
+    import numpy as np
+    from statsmodels.tsa.arima.model import ARIMA
+
+    rng = np.random.default_rng(0)
+    series = 100 + np.cumsum(rng.normal(0, 1, 60))
+    ARIMA(series, order=(2, 1, 2)).fit().get_forecast(steps=3)
+
+
+def _create_clients():
+    from app.claude_insights import api_key, get_client
+    from app.providers import get_provider
+
+    get_provider()
+    key = api_key()
+    if key:
+        get_client(key)
+
+
+def preload():
+    """Import the heavy modules and fit the tiny ARIMA model synchronously.
+
+    gunicorn.conf.py calls this in the parent process before forking, so
+    every worker shares these pages copy-on-write instead of importing its
+    own copy. It starts no threads and opens no connections.
+    """
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    _fit_tiny_arima()
+
+
+def warm_up():
+    """Run every warm-up step, then mark the instance ready.
+
+    A failing step is logged and skipped: a cold first request is better
+    than an instance that never becomes ready.
+    """
+    _state["started"] = time.time()
+    for step in (_fit_tiny_arima, _create_clients):
+        try:
+            step()
+        except Exception as exc:
+            logger.exception("Warm-up step %s failed", step.__name__)
+            _state["error"] = f"{step.__name__}: {exc}"
+    _state["finished"] = time.time()
+    logger.info("Warm-up finished in %.2fs", _state["finished"] - _state["started"])
+    _ready.set()
+
+
+def start_warm_up() -> threading.Thread | None:
+    """Kick off warm-up in the background, or mark ready when disabled."""
+    if not warmup_enabled():
+        _ready.set()
+        return None
+    _ready.clear()
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
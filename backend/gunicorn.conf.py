@@ -0,0 +1,43 @@
+"""Production serving: gunicorn pre-forking Uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app and its heavy dependencies are loaded once in the parent and
+shared copy-on-write by the workers. Background threads (warm-up, screener
+refresher, prefetcher) start in each worker's lifespan, after the fork.
+Caches and the upstream rate limit are shared across workers through a
+SQLite file (app.shared_store).
+
+Rolling restart: ``kill -HUP <master pid>`` starts fresh workers and lets
+the old ones finish in-flight requests within ``graceful_timeout``.
+Workers are also recycled after ``max_requests`` (with jitter, so they
+don't all restart at once).
+"""
+
+import multiprocessing
+import os
+
+from app import shared_store
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "200"))
+accesslog = "-"
+
+# Must be set before the app module is imported, which preload_app does
+# right after this file is read
+os.environ.setdefault("SHARED_STORE_PATH", shared_store.DEFAULT_STORE_PATH)
+
+
+def on_starting(server):
+    # Runs in the parent before any fork
+    from app import warmup
+
+    warmup.preload()
+    server.log.info("Preloaded %s", ", ".join(warmup.PRELOAD_MODULES))
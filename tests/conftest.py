@@ -1,6 +1,7 @@
 import os
 import sys
 import tempfile
+import time
 
 import pytest
 from dotenv import load_dotenv
@@ -8,6 +9,10 @@ from dotenv import load_dotenv
 # Add backend/ to sys.path so "from app.xxx import yyy" works
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
 
+from app.providers.guarded import GuardedProvider  # noqa: E402
+from app.providers.local import LocalProvider  # noqa: E402
+from app.resilience import CircuitBreaker, TokenBucket, time_left  # noqa: E402
+
 # Load .env from project root for CLAUDE_API_KEY etc.
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
@@ -35,3 +40,146 @@ def test_client(temp_data_dir):
 
     with TestClient(app) as client:
         yield client
+
+
+SNAPSHOT_TICKERS = ["AAPL", "MSFT", "SPY"]
+
+
+def _write_snapshot(directory, ticker, seed, days=600):
+    import json
+
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-06-28", periods=days, name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, days)))
+    open_ = close * (1 + rng.normal(0, 0.003, days))
+    frame = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.01,
+            "Low": np.minimum(open_, close) * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 5_000_000, days),
+        },
+        index=dates,
+    )
+    frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+
+    snapshot = {
+        "info": {
+            "quoteType": "EQUITY",
+            "symbol": ticker,
+            "longName": f"{ticker} Test Corp",
+            "sector": "Technology",
+            "industry": "Software",
+            "currentPrice": float(close[-1]),
+            "previousClose": float(close[-2]),
+            "trailingPE": 20.0 + seed,
+            "priceToBook": 5.0 + seed,
+            "marketCap": 1_000_000_000 * (seed + 1),
+            "returnOnEquity": 0.1 * (seed + 1),
+        },
+        "recommendations": [
+            {"period": "0m", "strongBuy": 5, "buy": 10, "hold": 3, "sell": 1, "strongSell": 0}
+        ],
+        "price_targets": {"current": float(close[-1]), "low": 80, "mean": 120, "median": 118, "high": 160},
+    }
+    with open(os.path.join(directory, f"{ticker}.info.json"), "w") as f:
+        json.dump(snapshot, f)
+
+
+@pytest.fixture()
+def market_dir(tmp_path):
+    """Directory of synthetic OHLCV + info snapshots for LocalProvider."""
+    directory = tmp_path / "market"
+    directory.mkdir()
+    for seed, ticker in enumerate(SNAPSHOT_TICKERS):
+        _write_snapshot(str(directory), ticker, seed)
+    return str(directory)
+
+
+@pytest.fixture()
+def local_provider(market_dir):
+    """Install a LocalProvider over ``market_dir`` for the duration of a test,
+    so data-path tests run offline and deterministically."""
+    from app import bar_cache
+    from app.providers import set_provider
+    from app.providers.local import LocalProvider
+
+    provider = LocalProvider(market_dir)
+    set_provider(provider)
+    bar_cache.forget()
+    yield provider
+    set_provider(None)
+    bar_cache.forget()
+
+
+class CountingProvider(LocalProvider):
+    """LocalProvider standing in for a remote upstream.
+
+    Counts calls (and records bar requests), can be switched to fail like a
+    throttled upstream (``failing``) or to raise a given ``error``, and can
+    pause per method: ``CountingProvider(d, bars=0.3)``.
+    """
+
+    def __init__(self, directory, remote: bool = True, **delays):
+        super().__init__(directory)
+        self.remote = remote
+        self.delays = delays
+        self.failing = False
+        self.error: Exception | None = None
+        self.calls = 0
+        self.requests = []
+        self.seen_deadline = None
+
+    def _call(self, method):
+        self.calls += 1
+        self.seen_deadline = time_left()
+        time.sleep(self.delays.get(method, 0))
+        if self.failing:
+            raise ConnectionError("429 Too Many Requests")
+        if self.error is not None:
+            raise self.error
+
+    def bars(self, ticker, period="1y", interval="1d", start=None, end=None):
+        self.requests.append((ticker.upper(), period, interval))
+        self._call("bars")
+        return super().bars(ticker, period, interval, start=start, end=end)
+
+    def info(self, ticker):
+        self._call("info")
+        return super().info(ticker)
+
+    def recommendations(self, ticker):
+        self._call("recommendations")
+        return super().recommendations(ticker)
+
+    def price_targets(self, ticker):
+        self._call("price_targets")
+        return super().price_targets(ticker)
+
+
+@pytest.fixture()
+def guarded_provider():
+    """Factory wrapping a provider in a GuardedProvider with test-sized limits."""
+
+    def make(inner, failures=2, reset=60.0, rate=100.0, shared=False):
+        return GuardedProvider(
+            inner,
+            bucket=TokenBucket(rate=rate, capacity=rate),
+            breaker=CircuitBreaker(failure_threshold=failures, reset_timeout=reset),
+            max_wait=0.05,
+            shared=shared,
+        )
+
+    return make
+
+
+@pytest.fixture()
+def auth_headers():
+    """Bearer header for a test user (token only; no CSV round trip)."""
+    from app.auth_utils import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token('tester')}"}
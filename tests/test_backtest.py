@@ -0,0 +1,64 @@
+"""Tests for the walk-forward ARIMA backtest."""
+
+import numpy as np
+import pytest
+
+import app.backtest_utils as backtest_utils
+from app.backtest_utils import MIN_TRAIN, run_backtest
+
+
+@pytest.fixture(scope="module")
+def close():
+    rng = np.random.default_rng(7)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, 200)))
+
+
+class TestRunBacktest:
+    def test_metrics_per_horizon(self, close):
+        result = run_backtest(close, origins=30, horizon=5, refit_every=10, workers=1)
+        assert result["origins"] == 30
+        assert [m["step"] for m in result["metrics"]] == [1, 2, 3, 4, 5]
+        for metric in result["metrics"]:
+            assert metric["mae"] > 0
+            assert 0 < metric["mape"] < 20
+            assert 0 <= metric["coverage"] <= 1
+        # Error grows with the forecast horizon on a random walk
+        assert result["metrics"][-1]["mae"] > result["metrics"][0]["mae"]
+
+    def test_origins_clamped_to_available_history(self, close):
+        result = run_backtest(close, origins=1000, horizon=5, refit_every=50, workers=1)
+        assert result["origins"] == len(close) - 5 - MIN_TRAIN + 1
+
+    def test_too_short_returns_none(self):
+        assert run_backtest(np.arange(MIN_TRAIN, dtype=float), origins=10, horizon=5) is None
+
+    def test_parallel_chunks(self, close):
+        try:
+            result = run_backtest(close, origins=20, horizon=3, refit_every=5, workers=2)
+        finally:
+            backtest_utils.shutdown_pool()
+        assert result["workers"] == 2
+        assert result["origins"] == 20
+        assert len(result["metrics"]) == 3
+
+
+class TestBacktestEndpoint:
+    def test_endpoint(self, test_client, auth_headers, local_provider, monkeypatch):
+        monkeypatch.setattr(backtest_utils, "BACKTEST_WORKERS", 1)
+        resp = test_client.get(
+            "/api/stock/AAPL/forecast/backtest?period=1y&origins=15&horizon=3",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["model"] == "ARIMA"
+        assert body["order"] == [2, 1, 2]
+        assert body["backtest"]["origins"] == 15
+
+    def test_unknown_ticker_404(self, test_client, auth_headers, local_provider):
+        resp = test_client.get("/api/stock/NOPE/forecast/backtest", headers=auth_headers)
+        assert resp.status_code == 404
+
+    def test_validates_horizon(self, test_client, auth_headers):
+        resp = test_client.get("/api/stock/AAPL/forecast/backtest?horizon=0", headers=auth_headers)
+        assert resp.status_code == 422
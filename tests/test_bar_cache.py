@@ -0,0 +1,127 @@
+"""Tests for deriving shorter periods and coarser intervals from held series."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from app import bar_cache
+from app.bar_cache import can_derive, covers, get_bars, resample_bars
+from app.providers import set_provider
+from app.stock_utils import fetch_ohlcv
+from tests.conftest import CountingProvider
+
+
+@pytest.fixture()
+def counting_provider(market_dir):
+    provider = CountingProvider(market_dir, remote=False)
+    set_provider(provider)
+    bar_cache.forget()
+    yield provider
+    set_provider(None)
+    bar_cache.forget()
+
+
+class TestRules:
+    @pytest.mark.parametrize(
+        "source, target, expected",
+        [
+            ("1d", "1d", True),
+            ("1d", "1wk", True),
+            ("1d", "3mo", True),
+            ("1wk", "1mo", False),
+            ("1wk", "3mo", False),
+            ("1mo", "3mo", True),
+            ("1mo", "1wk", False),
+            ("1m", "5m", True),
+            ("2m", "5m", False),
+            ("5m", "1h", False),
+            ("1h", "1d", False),
+        ],
+    )
+    def test_can_derive(self, source, target, expected):
+        assert can_derive(source, target) is expected
+
+    def test_covers(self):
+        assert covers("1y", "6mo")
+        assert covers("max", "10y")
+        assert not covers("6mo", "1y")
+        assert covers("1y", "ytd")
+        assert not covers("ytd", "1mo")
+
+
+class TestResample:
+    def test_weekly_ohlcv_aggregation(self):
+        idx = pd.bdate_range("2024-01-01", periods=10, name="Date")  # two Mon-Fri weeks
+        daily = pd.DataFrame(
+            {
+                "Open": range(1, 11),
+                "High": [x + 5 for x in range(1, 11)],
+                "Low": [x - 5 for x in range(1, 11)],
+                "Close": [x + 0.5 for x in range(1, 11)],
+                "Volume": [100] * 10,
+            },
+            index=idx,
+        ).astype(float)
+        weekly = resample_bars(daily, "1wk")
+        assert list(weekly.index) == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-08")]
+        first = weekly.iloc[0]
+        assert (first["Open"], first["High"], first["Low"], first["Close"], first["Volume"]) == (
+            1.0, 10.0, -4.0, 5.5, 500.0
+        )
+
+    def test_drops_empty_bins(self):
+        idx = pd.DatetimeIndex(["2024-01-02", "2024-03-04"], name="Date")
+        daily = pd.DataFrame({c: [1.0, 2.0] for c in bar_cache.OHLCV_AGG}, index=idx)
+        assert len(resample_bars(daily, "1mo")) == 2
+
+
+class TestGetBars:
+    def test_shorter_period_sliced_from_held(self, counting_provider):
+        full = get_bars("AAPL", "1y", "1d")
+        short = get_bars("AAPL", "6mo", "1d")
+        assert counting_provider.requests == [("AAPL", "1y", "1d")] * 2
+        assert short.index[-1] == full.index[-1]
+        assert len(short) < len(full)
+
+    def test_coarser_interval_resampled_from_held(self, counting_provider):
+        get_bars("AAPL", "2y", "1d")
+        weekly = get_bars("AAPL", "1y", "1wk")
+        assert all(r[2] == "1d" for r in counting_provider.requests)
+        assert 50 <= len(weekly) <= 54
+        assert (weekly.index.dayofweek == 0).all()
+
+    def test_monthly_built_from_daily_not_weekly(self, counting_provider, market_dir):
+        daily = get_bars("AAPL", "2y", "1d")
+        # An upstream weekly series is held as well
+        resample_bars(daily, "1wk").to_csv(os.path.join(market_dir, "AAPL.1wk.csv"))
+        bar_cache.forget()
+        get_bars("AAPL", "2y", "1wk")
+        get_bars("AAPL", "2y", "1d")
+        monthly = get_bars("AAPL", "1y", "1mo")
+        assert counting_provider.requests[-1] == ("AAPL", "2y", "1d")
+        # Each month's bar matches that calendar month of the daily series
+        for month_start, bar in monthly.iloc[1:].iterrows():
+            days = daily[daily.index.to_period("M") == month_start.to_period("M")]
+            assert bar["Close"] == pytest.approx(days["Close"].iloc[-1])
+            assert bar["High"] == pytest.approx(days["High"].max())
+            assert bar["Volume"] == days["Volume"].sum()
+
+    def test_older_data_goes_upstream(self, counting_provider):
+        get_bars("AAPL", "6mo", "1d")
+        get_bars("AAPL", "2y", "1d")
+        assert counting_provider.requests[-1] == ("AAPL", "2y", "1d")
+        # the longer series is now the one held
+        get_bars("AAPL", "1y", "1d")
+        assert counting_provider.requests[-1] == ("AAPL", "2y", "1d")
+
+    def test_unknown_ticker_not_remembered(self, counting_provider):
+        assert get_bars("NOPE", "1y", "1d").empty
+        assert "NOPE" not in bar_cache._held
+
+    def test_sma_recomputed_on_derived_frame(self, counting_provider):
+        fetch_ohlcv("AAPL", "2y", "1d")
+        weekly = fetch_ohlcv("AAPL", "2y", "1wk")
+        closes = [row["Close"] for row in weekly]
+        assert weekly[19]["SMA_20"] == pytest.approx(sum(closes[:20]) / 20, abs=0.02)
+        assert weekly[18]["SMA_20"] is None
@@ -10,6 +10,7 @@ from app.claude_insights import (
     _parse_response,
     get_insights,
     RATED_METRICS,
+    SYSTEM_PROMPT,
     _cache,
 )
 
@@ -118,6 +119,25 @@ class TestGetInsights:
         result = get_insights(SAMPLE_STOCK_DATA, "AAPL")
         assert result is None
 
+    def test_instructions_sent_as_system_prompt(self, monkeypatch):
+        calls = []
+
+        class Client:
+            messages = None
+
+            def create(self, **kwargs):
+                calls.append(kwargs)
+                raise TimeoutError("offline")
+
+        client = Client()
+        client.messages = client
+        monkeypatch.setenv("CLAUDE_API_KEY", "test-key")
+        monkeypatch.setattr("app.claude_insights.get_client", lambda _key: client)
+        _cache.clear()
+        assert get_insights(SAMPLE_STOCK_DATA, "AAPL") is None
+        assert calls[0]["system"] == SYSTEM_PROMPT
+        assert calls[0]["messages"][0]["content"] == _build_prompt(SAMPLE_STOCK_DATA)
+
     @pytest.mark.skipif(
         not os.getenv("CLAUDE_API_KEY")
         or os.getenv("CLAUDE_API_KEY") == "your-claude-api-key-here",
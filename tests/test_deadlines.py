@@ -0,0 +1,151 @@
+"""Tests for per-request deadlines and partial / stale responses."""
+
+import time
+
+import pytest
+
+from app import claude_insights
+from app.providers import set_provider
+from app.resilience import (
+    DeadlineExceeded,
+    deadline_scope,
+    staleness_scope,
+    time_left,
+)
+from app.stock_utils import fetch_ticker_info
+from tests.conftest import CountingProvider
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setenv("CLAUDE_API_KEY", "test-key")
+
+
+# ---------------------------------------------------------------------------
+# Deadline scope
+# ---------------------------------------------------------------------------
+class TestDeadlineScope:
+    def test_no_deadline_outside_scope(self):
+        assert time_left() is None
+
+    def test_time_left_counts_down_to_zero(self):
+        with deadline_scope(0.05):
+            assert 0 < time_left() <= 0.05
+            time.sleep(0.06)
+            assert time_left() == 0.0
+        assert time_left() is None
+
+
+# ---------------------------------------------------------------------------
+# GuardedProvider
+# ---------------------------------------------------------------------------
+class TestGuardedDeadline:
+    def test_slow_call_misses_deadline_but_is_cached(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir, bars=0.3)
+        provider = guarded_provider(inner)
+        started = time.monotonic()
+        with deadline_scope(0.05), pytest.raises(DeadlineExceeded):
+            provider.bars("AAPL")
+        assert time.monotonic() - started < 0.2
+        time.sleep(0.4)
+        assert not provider.bars("AAPL").empty
+        assert inner.calls == 1  # the late result was cached
+
+    def test_deadline_reaches_inner_provider(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        with deadline_scope(5):
+            guarded_provider(inner).bars("AAPL")
+        assert 0 < inner.seen_deadline <= 5
+
+    def test_expired_deadline_fails_fast(self, market_dir, guarded_provider):
+        with deadline_scope(0), pytest.raises(DeadlineExceeded):
+            guarded_provider(CountingProvider(market_dir)).bars("AAPL")
+
+
+# ---------------------------------------------------------------------------
+# fetch_ticker_info
+# ---------------------------------------------------------------------------
+class TestPartialInfo:
+    def test_slow_section_dropped_and_marked(self, market_dir):
+        set_provider(CountingProvider(market_dir, recommendations=0.5))
+        try:
+            started = time.monotonic()
+            with deadline_scope(0.2):
+                info = fetch_ticker_info("AAPL")
+        finally:
+            set_provider(None)
+        assert time.monotonic() - started < 0.45
+        assert info["partial"] == ["analyst.recommendations"]
+        assert info["analyst"]["recommendations"]["buy"] == 0
+        assert info["analyst"]["priceTargets"]["mean"] == 120
+
+    def test_complete_info_has_no_partial_marker(self, local_provider):
+        with deadline_scope(5):
+            assert "partial" not in fetch_ticker_info("AAPL")
+
+    def test_route_honours_header(self, test_client, auth_headers, market_dir):
+        set_provider(CountingProvider(market_dir, price_targets=0.5))
+        try:
+            started = time.monotonic()
+            resp = test_client.get(
+                "/api/stock/AAPL/info", headers={**auth_headers, "X-Request-Deadline": "200"}
+            )
+        finally:
+            set_provider(None)
+        assert time.monotonic() - started < 0.45
+        assert resp.status_code == 200
+        assert resp.json()["partial"] == ["analyst.priceTargets"]
+
+    def test_invalid_header_rejected(self, test_client, auth_headers, local_provider):
+        resp = test_client.get(
+            "/api/stock/AAPL/info", headers={**auth_headers, "X-Request-Deadline": "soon"}
+        )
+        assert resp.status_code == 400
+
+    def test_invalid_header_rejection_has_cors_headers(self, test_client, auth_headers, local_provider):
+        resp = test_client.get(
+            "/api/stock/AAPL/info",
+            headers={**auth_headers, "X-Request-Deadline": "0", "Origin": "http://localhost:5173"},
+        )
+        assert resp.status_code == 400
+        assert resp.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+
+# ---------------------------------------------------------------------------
+# Insights
+# ---------------------------------------------------------------------------
+class FailingClient:
+    def __init__(self):
+        self.calls = 0
+        self.messages = self
+
+    def with_options(self, **_options):
+        return self
+
+    def create(self, **_kwargs):
+        self.calls += 1
+        raise TimeoutError("model call timed out")
+
+
+class TestInsightsDeadline:
+    def test_failed_call_serves_expired_cache_as_stale(self, api_key, monkeypatch):
+        cached = {"overallScore": 70}
+        monkeypatch.setitem(claude_insights._cache, "AAPL", (time.time() - 2 * claude_insights.CACHE_TTL, cached, claude_insights.CACHE_TTL))
+        client = FailingClient()
+        monkeypatch.setattr(claude_insights, "get_client", lambda _key: client)
+        with staleness_scope() as stale:
+            assert claude_insights.get_insights({}, "AAPL") == cached
+        assert client.calls == 1
+        assert stale and stale[0] >= claude_insights.CACHE_TTL
+
+    def test_no_call_when_deadline_nearly_spent(self, api_key, monkeypatch):
+        client = FailingClient()
+        monkeypatch.setattr(claude_insights, "get_client", lambda _key: client)
+        monkeypatch.delitem(claude_insights._cache, "MSFT", raising=False)
+        with deadline_scope(0.1):
+            assert claude_insights.get_insights({}, "MSFT") is None
+        assert client.calls == 0
+
+    def test_client_is_shared(self):
+        pytest.importorskip("anthropic")
+        assert claude_insights.get_client("k1") is claude_insights.get_client("k1")
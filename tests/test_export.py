@@ -0,0 +1,131 @@
+"""Tests for the streaming bulk export endpoint (offline, LocalProvider)."""
+
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import app.export_utils as export_utils
+from app.export_utils import iter_ticker_bars, stream_csv, stream_ndjson
+from app.providers import set_provider
+from app.resilience import TokenBucket, UpstreamUnavailable
+from tests.conftest import CountingProvider
+
+
+class TestExportGenerators:
+    def test_csv_chunks_cover_all_rows(self, local_provider, monkeypatch):
+        monkeypatch.setattr(export_utils, "EXPORT_CHUNK_ROWS", 50)
+        chunks = list(stream_csv(["AAPL", "MSFT"], "2024-01-01", "2024-04-01", "1d"))
+        assert chunks[0] == "Ticker,Date,Open,High,Low,Close,Volume\n"
+        assert len(chunks) > 3
+        frame = pd.read_csv(io.StringIO("".join(chunks)))
+        assert set(frame["Ticker"]) == {"AAPL", "MSFT"}
+        assert frame["Date"].min() >= "2024-01-01"
+        assert frame["Date"].max() < "2024-04-01"
+
+    def test_order_preserved_with_prefetch(self, local_provider, monkeypatch):
+        monkeypatch.setattr(export_utils, "EXPORT_PREFETCH", 2)
+        tickers = ["SPY", "AAPL", "NOPE", "MSFT"]
+        assert [t for t, _ in iter_ticker_bars(tickers, None, None, "1d")] == tickers
+
+    def test_prefetch_bounds_frames_in_flight(self, local_provider, monkeypatch):
+        monkeypatch.setattr(export_utils, "EXPORT_PREFETCH", 1)
+        calls = []
+        original = export_utils._fetch
+
+        def tracking_fetch(ticker, *args):
+            calls.append(ticker)
+            return original(ticker, *args)
+
+        monkeypatch.setattr(export_utils, "_fetch", tracking_fetch)
+        gen = iter_ticker_bars(["AAPL", "MSFT", "SPY"], None, None, "1d")
+        next(gen)
+        assert len(calls) <= 2  # the current ticker plus one prefetched
+        list(gen)
+        assert sorted(calls) == ["AAPL", "MSFT", "SPY"]
+
+    def test_no_range_exports_full_history_uncached(self, market_dir, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        set_provider(provider)
+        try:
+            frame = pd.read_csv(io.StringIO("".join(stream_csv(["AAPL"], None, None, "1d"))))
+        finally:
+            set_provider(None)
+        assert len(frame) == 600  # the whole snapshot, not the default 1y window
+        assert provider.cache_usage()["entries"] == 0
+
+    def test_exports_leave_user_burst(self, market_dir, monkeypatch, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bucket = TokenBucket(rate=0.01, capacity=4)
+        monkeypatch.setattr(export_utils, "EXPORT_MAX_WAIT", 0.05)
+        set_provider(provider)
+        try:
+            provider.bucket.acquire(timeout=0)  # recent user traffic
+            csv = "".join(stream_csv(["AAPL"], "2024-01-01", None, "1d"))
+            assert provider.bucket.acquire(timeout=0)  # the rest is still there
+        finally:
+            set_provider(None)
+        assert inner.calls == 0
+        assert csv.splitlines()[-1] == "# error: AAPL upstream unavailable"
+
+    def test_unavailable_ticker_reported_in_stream(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.failing = True
+        set_provider(guarded_provider(inner, failures=10))
+        try:
+            csv = "".join(stream_csv(["AAPL"], "2024-01-01", None, "1d"))
+            lines = list(stream_ndjson(["AAPL"], "2024-01-01", None, "1d"))
+            with pytest.raises(UpstreamUnavailable):
+                list(export_utils.stream_arrow(["AAPL"], "2024-01-01", None, "1d"))
+        finally:
+            set_provider(None)
+        assert csv.splitlines()[-1] == "# error: AAPL upstream unavailable"
+        assert json.loads(lines[-1]) == {"Ticker": "AAPL", "error": "upstream unavailable"}
+
+
+class TestExportEndpoint:
+    def test_ndjson(self, test_client, auth_headers, local_provider):
+        resp = test_client.get(
+            "/api/stock/export?tickers=aapl,spy&start=2024-06-01&format=ndjson",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert {r["Ticker"] for r in rows} == {"AAPL", "SPY"}
+        assert isinstance(rows[0]["Volume"], int)
+
+    def test_arrow(self, test_client, auth_headers, local_provider):
+        pa = pytest.importorskip("pyarrow")
+        resp = test_client.get(
+            "/api/stock/export?tickers=AAPL,MSFT&start=2023-01-01&end=2024-01-01&format=arrow",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        table = pa.ipc.open_stream(resp.content).read_all()
+        assert table.column_names == export_utils.EXPORT_COLUMNS
+        assert table.num_rows > 400
+
+    def test_rejects_bad_format(self, test_client, auth_headers):
+        resp = test_client.get("/api/stock/export?tickers=AAPL&format=xlsx", headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_rejects_bad_interval_before_streaming(self, test_client, auth_headers, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        set_provider(guarded_provider(inner, failures=1))
+        try:
+            resp = test_client.get("/api/stock/export?tickers=AAPL&interval=7m", headers=auth_headers)
+        finally:
+            set_provider(None)
+        assert resp.status_code == 400
+        assert inner.calls == 0
+
+    def test_rejects_too_many_tickers(self, test_client, auth_headers):
+        tickers = ",".join(f"T{i}" for i in range(export_utils.EXPORT_MAX_TICKERS + 1))
+        resp = test_client.get(f"/api/stock/export?tickers={tickers}", headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_requires_auth(self, test_client):
+        assert test_client.get("/api/stock/export?tickers=AAPL").status_code in (401, 403)
@@ -0,0 +1,155 @@
+"""Tests for the tiered forecast models and latency-budget selection."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import app.forecast_models as forecast_models
+import app.forecast_utils as forecast_utils
+from app.forecast_models import TIERS, ar, drift, ses
+from app.forecast_utils import fetch_forecast
+
+
+@pytest.fixture(scope="module")
+def close():
+    rng = np.random.default_rng(3)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, 252)))
+
+
+class TestModels:
+    @pytest.mark.parametrize("name", list(TIERS))
+    def test_shapes_and_interval_order(self, close, name):
+        result = TIERS[name](close, 7)
+        for key in ("mean", "lower", "upper"):
+            assert result[key].shape == (7,)
+        assert np.all(result["lower"] < result["mean"])
+        assert np.all(result["mean"] < result["upper"])
+        # Uncertainty widens with the horizon
+        width = result["upper"] - result["lower"]
+        assert width[-1] > width[0]
+
+    def test_drift_follows_linear_trend(self):
+        series = 100 + np.arange(100, dtype=float) + np.tile([0.1, -0.1], 50)
+        result = drift(series, 3)
+        assert result["order"] == [0, 1, 0]
+        assert result["mean"] == pytest.approx(series[-1] + np.arange(1, 4), abs=0.05)
+
+    def test_ses_forecast_is_flat(self, close):
+        result = ses(close, 5)
+        assert result["model"] == "SES"
+        assert np.ptp(result["mean"]) == 0
+
+    def test_ar_recovers_coefficients(self):
+        rng = np.random.default_rng(0)
+        changes = np.zeros(3000)
+        for t in range(2, len(changes)):
+            changes[t] = 0.5 * changes[t - 1] - 0.2 * changes[t - 2] + rng.normal()
+        series = 1000 + np.cumsum(changes)
+        result = ar(series, 1)
+        expected = series[-1] + 0.5 * changes[-1] - 0.2 * changes[-2]
+        assert result["mean"][0] == pytest.approx(expected, abs=0.15)
+        assert result["order"] == [2, 1, 0]
+
+    @pytest.mark.parametrize("name", ["drift", "ses", "ar"])
+    def test_fast_tiers_are_fast(self, close, name):
+        TIERS[name](close, 7)
+        started = time.perf_counter()
+        for _ in range(20):
+            TIERS[name](close, 7)
+        assert (time.perf_counter() - started) / 20 < 0.01
+
+
+class TestFetchForecast:
+    def test_model_parameter(self, local_provider):
+        result = fetch_forecast("AAPL", "1y", 5, model="ses")
+        assert result["model"] == "SES"
+        assert result["order"] == [0, 1, 1]
+        assert len(result["forecast"]) == 5
+
+    def test_default_is_arima(self, local_provider):
+        result = fetch_forecast("AAPL", "1y", 5)
+        assert result["model"] == "ARIMA"
+        assert result["order"] == [2, 1, 2]
+
+    def test_budget_falls_back_when_arima_is_slow(self, local_provider, monkeypatch):
+        def slow_arima(close, steps):
+            time.sleep(0.5)
+            raise AssertionError("should not be waited for")
+
+        monkeypatch.setitem(TIERS, "arima", slow_arima)
+        started = time.perf_counter()
+        result = fetch_forecast("AAPL", "1y", 5, model="auto", budget_ms=50)
+        assert time.perf_counter() - started < 0.4
+        assert result["model"] == "AR"
+        assert len(result["forecast"]) == 5
+
+    def test_abandoned_fit_blocks_new_submissions(self, local_provider, monkeypatch):
+        release = threading.Event()
+        started = []
+
+        def stuck_arima(close, steps):
+            started.append(1)
+            release.wait(5)
+            raise AssertionError("should not be waited for")
+
+        monkeypatch.setitem(TIERS, "arima", stuck_arima)
+        monkeypatch.setattr(forecast_utils, "FORECAST_WORKERS", 1)
+        monkeypatch.setattr(forecast_utils, "_pending", set())
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(forecast_utils, "_executor", executor)
+        try:
+            assert fetch_forecast("AAPL", "1y", 5, model="arima", budget_ms=300)["model"] == "AR"
+            # The abandoned fit still holds the only worker: answer without queueing
+            result = fetch_forecast("AAPL", "1y", 5, model="arima", budget_ms=300)
+            assert result["model"] == "Drift"
+            assert len(started) == 1
+        finally:
+            release.set()
+            executor.shutdown(wait=True)
+        assert not forecast_utils._pending
+
+    def test_timed_out_queued_tier_is_cancelled(self, monkeypatch, close):
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(forecast_utils, "_executor", executor)
+        monkeypatch.setattr(forecast_utils, "_pending", set())
+        submitted = []
+        submit = forecast_utils._submit
+        monkeypatch.setattr(forecast_utils, "_submit", lambda *args: submitted.append(submit(*args)) or submitted[-1])
+        blocker = executor.submit(release.wait, 5)  # outside _pending: the pool looks free
+        try:
+            best = forecast_utils._run_within_budget(close, 5, ["drift", "ses"], budget_ms=50)
+            assert best["model"] == "Drift"
+            assert submitted[0].cancelled()
+            assert not forecast_utils._pending
+        finally:
+            release.set()
+            blocker.result()
+            executor.shutdown(wait=True)
+        assert not forecast_utils._pending
+
+    def test_generous_budget_returns_requested_model(self, local_provider):
+        result = fetch_forecast("AAPL", "1y", 5, model="arima", budget_ms=30000)
+        assert result["model"] == "ARIMA"
+
+    def test_budget_never_exceeds_requested_tier(self, local_provider):
+        result = fetch_forecast("AAPL", "1y", 5, model="ses", budget_ms=30000)
+        assert result["model"] == "SES"
+
+    def test_unknown_model_rejected(self, local_provider):
+        with pytest.raises(ValueError):
+            fetch_forecast("AAPL", model="prophet")
+
+    def test_endpoint(self, test_client, auth_headers, local_provider):
+        ok = test_client.get("/api/stock/AAPL/forecast?model=drift&days=3", headers=auth_headers)
+        assert ok.status_code == 200
+        assert ok.json()["model"] == "Drift"
+        bad = test_client.get("/api/stock/AAPL/forecast?model=prophet", headers=auth_headers)
+        assert bad.status_code == 400
+
+
+def test_tiers_ordered_cheapest_first():
+    assert list(forecast_models.TIERS) == ["drift", "ses", "ar", "arima"]
@@ -0,0 +1,204 @@
+"""Tests for bulk insights through the Message Batches API, against a local
+stub of the model API."""
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import claude_insights, insights_batch
+from app.claude_insights import RATED_METRICS, SYSTEM_PROMPT, _build_prompt
+
+
+def _evaluation(ticker: str) -> dict:
+    return {
+        "metrics": {
+            m: {"score": 6, "label": "Good", "color": "yellow-green", "explanation": f"{ticker} is near its sector median."}
+            for m in RATED_METRICS
+        },
+        "overallScore": 60 + len(ticker),
+        "overallLabel": "Above Average",
+        "overallSummary": f"{ticker} looks healthy for its sector.",
+    }
+
+
+class StubBatchAPI(BaseHTTPRequestHandler):
+    """Just enough of /v1/messages/batches: create, retrieve, results."""
+
+    batches: dict = {}
+    polls_until_ended = 2
+    bad_tickers: set = set()
+    errored_ids: set = set()
+
+    def log_message(self, *_args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "application/json"):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _batch(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        ended = batch["polls"] >= self.polls_until_ended
+        host = f"http://{self.headers['Host']}"
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else len(batch["requests"]), "succeeded": 0,
+                               "errored": 0, "canceled": 0, "expired": 0},
+            "created_at": "2026-10-19T00:00:00Z",
+            "expires_at": "2026-10-20T00:00:00Z",
+            "results_url": f"{host}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _result(self, request: dict) -> dict:
+        if request["custom_id"] in self.errored_ids:
+            error = {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+            return {"custom_id": request["custom_id"], "result": {"type": "errored", "error": error}}
+        params = request["params"]
+        prompt = params["messages"][0]["content"]
+        sections = []
+        for ticker in re.findall(r"^### (\S+)$", prompt, re.MULTILINE):
+            body = "not json" if ticker in self.bad_tickers else json.dumps(_evaluation(ticker))
+            sections.append(f"### {ticker}\n{body}")
+        text = "\n\n".join(sections)
+        message = {
+            "id": "msg_stub",
+            "type": "message",
+            "role": "assistant",
+            "model": params["model"],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": (len(params["system"]) + len(prompt)) // 4, "output_tokens": len(text) // 4},
+        }
+        return {"custom_id": request["custom_id"], "result": {"type": "succeeded", "message": message}}
+
+    def do_POST(self):
+        if self.path.endswith("/cancel"):
+            batch_id = self.path.strip("/").split("/")[3]
+            self.batches[batch_id]["canceled"] = True
+            self._send(200, json.dumps(self._batch(batch_id)))
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        batch_id = f"msgbatch_{len(self.batches)}"
+        self.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+        self._send(200, json.dumps(self._batch(batch_id)))
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        batch_id = parts[3]
+        if parts[-1] == "results":
+            lines = [json.dumps(self._result(r)) for r in self.batches[batch_id]["requests"]]
+            self._send(200, "\n".join(lines), "application/binary")
+        else:
+            self.batches[batch_id]["polls"] += 1
+            self._send(200, json.dumps(self._batch(batch_id)))
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    anthropic = pytest.importorskip("anthropic")
+    StubBatchAPI.batches = {}
+    StubBatchAPI.bad_tickers = set()
+    StubBatchAPI.errored_ids = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBatchAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = anthropic.Anthropic(api_key="test-key", base_url=f"http://127.0.0.1:{server.server_port}", max_retries=0)
+    monkeypatch.setenv("CLAUDE_API_KEY", "test-key")
+    monkeypatch.setattr(claude_insights, "get_client", lambda _key: client)
+    monkeypatch.setattr(claude_insights, "_cache", {})
+    yield StubBatchAPI
+    server.shutdown()
+
+
+def _run(tickers, **kwargs):
+    return insights_batch.run_bulk_insights(tickers, poll_interval=0.01, max_wait=5, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Prompts
+# ---------------------------------------------------------------------------
+class TestPrompts:
+    def test_instructions_live_in_system_prompt(self):
+        prompt = _build_prompt({"profile": {"longName": "Apple Inc."}})
+        assert "Return ONLY valid JSON" in SYSTEM_PROMPT
+        assert "Return ONLY valid JSON" not in prompt
+
+    def test_requests_group_tickers(self):
+        stocks = {t: {"profile": {"longName": t}} for t in ["AAPL", "MSFT", "SPY"]}
+        requests, groups = insights_batch.build_requests(stocks, group_size=2)
+        assert groups == {"group-0": ["AAPL", "MSFT"], "group-1": ["SPY"]}
+        params = requests[0]["params"]
+        assert params["system"] == SYSTEM_PROMPT
+        assert params["max_tokens"] == 2 * claude_insights.MAX_TOKENS
+        content = params["messages"][0]["content"]
+        assert "### AAPL" in content and "### MSFT" in content and "### SPY" not in content
+
+    def test_split_sections(self):
+        text = "### AAPL\n{\"a\": 1}\n\n### brk-b\n{\"b\": 2}"
+        assert insights_batch._split_sections(text) == {"AAPL": "\n{\"a\": 1}\n\n", "BRK-B": "\n{\"b\": 2}"}
+
+
+# ---------------------------------------------------------------------------
+# Bulk job against the stub API
+# ---------------------------------------------------------------------------
+class TestRunBulkInsights:
+    def test_results_validated_and_cached(self, stub_api, local_provider):
+        summary = _run(["AAPL", "MSFT", "SPY"], group_size=2)
+        assert summary["succeeded"] == ["AAPL", "MSFT", "SPY"]
+        assert summary["failed"] == []
+        assert len(stub_api.batches) == 1
+        assert len(stub_api.batches[summary["batchId"]]["requests"]) == 2
+        assert claude_insights._cache["MSFT"][1] == _evaluation("MSFT")
+        assert summary["inputTokens"] > 0 and summary["costUsd"] > 0
+
+    def test_invalid_and_errored_results_are_failures(self, stub_api, local_provider):
+        stub_api.bad_tickers = {"MSFT"}
+        stub_api.errored_ids = {"group-1"}
+        summary = _run(["AAPL", "MSFT", "SPY"], group_size=2)
+        assert summary["succeeded"] == ["AAPL"]
+        assert sorted(summary["failed"]) == ["MSFT", "SPY"]
+        assert set(claude_insights._cache) == {"AAPL"}
+
+    def test_fresh_tickers_skipped(self, stub_api, local_provider):
+        claude_insights.store("AAPL", _evaluation("AAPL"))
+        summary = _run(["aapl", "MSFT"])
+        assert summary["skipped"] == ["AAPL"]
+        assert summary["succeeded"] == ["MSFT"]
+
+    def test_unknown_ticker_not_submitted(self, stub_api, local_provider):
+        summary = _run(["NOPE"])
+        assert summary["failed"] == ["NOPE"]
+        assert summary["batchId"] is None
+
+    def test_cached_result_served_by_get_insights(self, stub_api, local_provider):
+        _run(["AAPL"])
+        assert claude_insights.get_insights({}, "AAPL") == _evaluation("AAPL")
+
+    def test_results_outlive_the_interactive_ttl(self, stub_api, local_provider, monkeypatch):
+        _run(["AAPL"])
+        stored_at, insights, ttl = claude_insights._cache["AAPL"]
+        assert ttl == claude_insights.INSIGHTS_BULK_TTL
+        # Eight hours later (an overnight run read the next afternoon) it is still fresh
+        monkeypatch.setitem(claude_insights._cache, "AAPL", (stored_at - 8 * 3600, insights, ttl))
+        monkeypatch.setattr(claude_insights, "get_client", lambda _key: pytest.fail("model called"))
+        assert claude_insights.is_fresh("AAPL")
+        assert claude_insights.get_insights({}, "AAPL") == _evaluation("AAPL")
+
+    def test_cancels_after_max_wait(self, stub_api, local_provider, monkeypatch):
+        monkeypatch.setattr(stub_api, "polls_until_ended", 10_000)
+        with pytest.raises(TimeoutError):
+            insights_batch.run_bulk_insights(["AAPL"], poll_interval=0.01, max_wait=0.05)
+        assert stub_api.batches["msgbatch_0"]["canceled"]
+
+    def test_cost_halved_for_batches(self):
+        assert insights_batch.cost_usd(1_000_000, 0) == 1.5
+        assert insights_batch.cost_usd(0, 1_000_000, batch=False) == 15.0
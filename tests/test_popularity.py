@@ -0,0 +1,186 @@
+"""Tests for popularity tracking, request metrics and refresh-ahead prefetching."""
+
+import time
+
+import pytest
+
+import app.providers.guarded as guarded
+from app import bar_cache, claude_insights, metrics, popularity
+from app.providers import set_provider
+from app.resilience import TokenBucket
+from tests.conftest import CountingProvider
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    popularity.counter.clear()
+    metrics.reset()
+    bar_cache.forget()
+    yield
+    popularity.counter.clear()
+    metrics.reset()
+    bar_cache.forget()
+    set_provider(None)
+
+
+# ---------------------------------------------------------------------------
+# DecayingCounter
+# ---------------------------------------------------------------------------
+class TestDecayingCounter:
+    def test_ranks_by_count(self):
+        counter = popularity.DecayingCounter(half_life=60)
+        for ticker, hits in [("AAPL", 5), ("MSFT", 2), ("SPY", 9)]:
+            for _ in range(hits):
+                counter.add(ticker, now=0)
+        assert [t for t, _ in counter.top(2, now=0)] == ["SPY", "AAPL"]
+
+    def test_scores_halve_every_half_life(self):
+        counter = popularity.DecayingCounter(half_life=60)
+        counter.add("AAPL", 8, now=0)
+        assert counter.top(1, now=120)[0][1] == pytest.approx(2.0)
+
+    def test_recent_traffic_overtakes_old(self):
+        counter = popularity.DecayingCounter(half_life=60)
+        counter.add("OLD", 10, now=0)
+        counter.add("NEW", 3, now=300)
+        assert counter.top(1, now=300)[0][0] == "NEW"
+
+    def test_prunes_coldest_keys(self):
+        counter = popularity.DecayingCounter(half_life=60, max_tracked=2)
+        counter.add("A", 5, now=0)
+        counter.add("B", 1, now=0)
+        counter.add("C", 3, now=0)
+        assert sorted(t for t, _ in counter.top(10, now=0)) == ["A", "C"]
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+class TestMetrics:
+    def test_classify(self):
+        assert metrics.classify({"hit": 2, "stale": 0, "miss": 0}) == "hit"
+        assert metrics.classify({"hit": 1, "stale": 1, "miss": 0}) == "stale"
+        assert metrics.classify({"hit": 1, "stale": 1, "miss": 1}) == "miss"
+        assert metrics.classify({"hit": 0, "stale": 0, "miss": 0}) == "none"
+
+    def test_snapshot_reports_hit_rate_and_percentiles(self):
+        for ms in range(1, 101):
+            outcome = {"hit": 1, "stale": 0, "miss": 0} if ms > 25 else {"hit": 0, "stale": 0, "miss": 1}
+            metrics.record("aapl", ms / 1000, outcome)
+        stats = metrics.snapshot()["AAPL"]
+        assert stats["requests"] == 100
+        assert stats["hitRate"] == 0.75
+        assert stats["p50Ms"] == pytest.approx(50.5)
+        assert stats["p99Ms"] == pytest.approx(99.01)
+
+    def test_note_cache_outside_scope_is_noop(self):
+        metrics.note_cache("hit")
+
+
+# ---------------------------------------------------------------------------
+# Refresh-ahead
+# ---------------------------------------------------------------------------
+class TestRefreshAhead:
+    def test_expiring_lists_keys_near_ttl(self, market_dir, monkeypatch, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        provider.bars("AAPL", "1mo")
+        provider.bars("MSFT", "1mo")
+        assert provider.expiring({"AAPL", "MSFT"}, lead=60) == []
+        monkeypatch.setitem(guarded.FRESH_TTL, "bars", 30)
+        assert provider.expiring({"AAPL"}, lead=60) == [("bars", "AAPL", "1mo", "1d")]
+
+    def test_refresh_ahead_updates_entry(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bars("AAPL", "1mo")
+        before = provider._entries[("bars", "AAPL", "1mo", "1d")][0]
+        assert provider.refresh_ahead(("bars", "AAPL", "1mo", "1d"))
+        assert inner.calls == 2
+        assert provider._entries[("bars", "AAPL", "1mo", "1d")][0] > before
+
+    def test_refresh_ahead_never_waits_for_tokens(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bucket = TokenBucket(rate=0.01, capacity=1)
+        provider.bars("AAPL", "1mo")
+        started = time.monotonic()
+        assert not provider.refresh_ahead(("bars", "AAPL", "1mo", "1d"))
+        assert time.monotonic() - started < 0.05
+        assert inner.calls == 1
+
+    def test_refresh_ahead_skipped_unless_breaker_closed(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bars("AAPL", "1mo")
+        provider.breaker.record_failure()
+        provider.breaker.record_failure()
+        assert not provider.refresh_ahead(("bars", "AAPL", "1mo", "1d"))
+        assert inner.calls == 1
+
+    def test_cycle_refreshes_hot_tickers_only(self, market_dir, monkeypatch, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        set_provider(provider)
+        for ticker in ("AAPL", "MSFT"):
+            provider.bars(ticker, "1mo")
+        popularity.record("AAPL")
+        monkeypatch.setattr(popularity, "PREFETCH_TOP_K", 1)
+        monkeypatch.setitem(guarded.FRESH_TTL, "bars", 30)
+        cycle = popularity.run_prefetch_cycle()
+        assert cycle["refreshed"] == 1
+        assert inner.calls == 3
+
+    def test_cycle_respects_per_cycle_cap(self, market_dir, monkeypatch, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        set_provider(provider)
+        for ticker in ("AAPL", "MSFT", "SPY"):
+            provider.bars(ticker, "1mo")
+            popularity.record(ticker)
+        monkeypatch.setattr(popularity, "PREFETCH_MAX_PER_CYCLE", 2)
+        monkeypatch.setitem(guarded.FRESH_TTL, "bars", 30)
+        cycle = popularity.run_prefetch_cycle()
+        assert cycle["refreshed"] == 2
+        assert cycle["skipped"] == 1
+
+    def test_refresh_insights_reports_whether_entry_replaced(self, local_provider, monkeypatch):
+        monkeypatch.setattr(claude_insights, "_cache", {})
+        claude_insights.store("AAPL", {"overallScore": 50})
+        monkeypatch.setattr(claude_insights, "get_insights", lambda *args, **kwargs: None)
+        assert popularity._refresh_insights("AAPL") is False
+
+        def refreshed(_info, ticker, refresh=False):
+            claude_insights.store(ticker, {"overallScore": 60})
+
+        monkeypatch.setattr(claude_insights, "_cache", {"AAPL": (0.0, {"overallScore": 50}, 3600)})
+        monkeypatch.setattr(claude_insights, "get_insights", refreshed)
+        assert popularity._refresh_insights("AAPL") is True
+
+    def test_cycle_refreshes_expiring_insights(self, monkeypatch):
+        monkeypatch.setitem(claude_insights._cache, "AAPL", (time.time() - claude_insights.CACHE_TTL, {}, claude_insights.CACHE_TTL))
+        refreshed = []
+        monkeypatch.setattr(popularity, "_refresh_insights", lambda t: refreshed.append(t) or True)
+        popularity.record("AAPL")
+        assert popularity.run_prefetch_cycle()["insights"] == 1
+        assert refreshed == ["AAPL"]
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+class TestRoutes:
+    def test_requests_tracked_in_stats(self, test_client, auth_headers, market_dir, guarded_provider):
+        set_provider(guarded_provider(CountingProvider(market_dir)))
+        for _ in range(3):
+            assert test_client.get("/api/stock/AAPL?period=1mo", headers=auth_headers).status_code == 200
+        test_client.get("/api/stock/MSFT?period=1mo", headers=auth_headers)
+        stats = test_client.get("/api/stock/cache/stats", headers=auth_headers).json()
+        assert [row["ticker"] for row in stats["hot"]] == ["AAPL", "MSFT"]
+        aapl = stats["hot"][0]
+        assert aapl["requests"] == 3
+        assert aapl["hitRate"] == pytest.approx(2 / 3, abs=1e-3)
+        assert stats["overall"]["requests"] == 4
+
+    def test_failed_requests_not_counted(self, test_client, auth_headers, market_dir, guarded_provider):
+        set_provider(guarded_provider(CountingProvider(market_dir)))
+        test_client.get("/api/stock/NOPE?period=1mo", headers=auth_headers)
+        assert popularity.counter.top(5) == []
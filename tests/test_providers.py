@@ -0,0 +1,153 @@
+"""Tests for the pluggable market-data providers (offline, file-backed)."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from app.forecast_utils import fetch_forecast
+from app.providers import _build_provider, get_provider, set_provider
+from app.providers.base import OHLCV_COLUMNS, normalize_bars, slice_period
+from app.providers.local import LocalProvider
+from app.providers.replay import RecordingProvider, ReplayProvider
+from app.stock_utils import fetch_ohlcv, fetch_ticker_info
+
+
+# ---------------------------------------------------------------------------
+# Period slicing / normalisation
+# ---------------------------------------------------------------------------
+class TestSlicePeriod:
+    def _frame(self, days=400):
+        idx = pd.bdate_range(end="2024-06-28", periods=days, name="Date")
+        return pd.DataFrame({c: 1.0 for c in OHLCV_COLUMNS}, index=idx)
+
+    def test_trading_day_periods(self):
+        assert len(slice_period(self._frame(), "5d")) == 5
+
+    def test_calendar_periods(self):
+        sliced = slice_period(self._frame(), "1mo")
+        assert sliced.index[0] > pd.Timestamp("2024-05-28")
+        assert sliced.index[-1] == pd.Timestamp("2024-06-28")
+
+    def test_ytd_and_max(self):
+        frame = self._frame()
+        assert slice_period(frame, "ytd").index[0].year == 2024
+        assert len(slice_period(frame, "max")) == len(frame)
+
+    def test_unknown_period_raises(self):
+        with pytest.raises(ValueError):
+            slice_period(self._frame(), "3w")
+
+    def test_flattens_multiindex_columns(self):
+        frame = self._frame(3)
+        frame.columns = pd.MultiIndex.from_product([frame.columns, ["AAPL"]])
+        assert list(normalize_bars(frame).columns) == OHLCV_COLUMNS
+
+
+# ---------------------------------------------------------------------------
+# LocalProvider
+# ---------------------------------------------------------------------------
+class TestLocalProvider:
+    def test_bars_sliced_to_period(self, market_dir):
+        bars = LocalProvider(market_dir).bars("aapl", period="6mo")
+        assert 120 <= len(bars) <= 135
+        assert list(bars.columns) == OHLCV_COLUMNS
+        assert bars.index.name == "Date"
+
+    def test_unknown_ticker_is_empty(self, market_dir):
+        provider = LocalProvider(market_dir)
+        assert provider.bars("NOPE").empty
+        assert provider.info("NOPE") == {}
+        assert provider.recommendations("NOPE") is None
+
+    def test_returned_frames_are_independent(self, market_dir):
+        provider = LocalProvider(market_dir)
+        frame = provider.bars("AAPL")
+        frame["Close"] = 0.0
+        assert (provider.bars("AAPL")["Close"] > 0).all()
+
+    def test_fetch_ohlcv_uses_provider(self, local_provider):
+        data = fetch_ohlcv("AAPL", period="1y", interval="1d")
+        assert len(data) > 200
+        assert data[-1]["SMA_200"] is not None
+        assert isinstance(data[0]["Volume"], int)
+
+    def test_fetch_ticker_info_uses_provider(self, local_provider):
+        info = fetch_ticker_info("MSFT")
+        assert info["profile"]["longName"] == "MSFT Test Corp"
+        assert info["analyst"]["recommendations"]["buy"] == 10
+        assert info["analyst"]["priceTargets"]["high"] == 160
+
+    def test_fetch_forecast_uses_provider(self, local_provider):
+        result = fetch_forecast("AAPL", period="1y", days=5)
+        assert len(result["forecast"]) == 5
+
+
+# ---------------------------------------------------------------------------
+# Record / replay
+# ---------------------------------------------------------------------------
+class TestReplay:
+    def test_round_trip(self, market_dir, tmp_path):
+        replay_dir = str(tmp_path / "replay")
+        recorder = RecordingProvider(LocalProvider(market_dir), replay_dir)
+        live_bars = recorder.bars("AAPL", "3mo", "1d")
+        live_info = recorder.info("AAPL")
+        recorder.recommendations("AAPL")
+        recorder.price_targets("AAPL")
+
+        replay = ReplayProvider(replay_dir)
+        pd.testing.assert_frame_equal(replay.bars("AAPL", "3mo", "1d"), live_bars, check_freq=False)
+        assert replay.info("AAPL") == live_info
+        assert replay.recommendations("AAPL").iloc[0]["buy"] == 10
+        assert replay.price_targets("AAPL")["mean"] == 120
+
+    def test_intraday_round_trip_across_dst(self, market_dir, tmp_path):
+        # US clocks went forward on 2024-03-10: offsets change from -05:00 to -04:00
+        index = pd.date_range("2024-03-08 09:30", "2024-03-12 15:30", freq="1h", tz="America/New_York", name="Date")
+        hourly = pd.DataFrame({c: 1.0 for c in OHLCV_COLUMNS}, index=index)
+        hourly.to_csv(f"{market_dir}/AAPL.1h.csv")
+        with open(f"{market_dir}/AAPL.info.json", "w") as f:
+            json.dump({"info": {"exchangeTimezoneName": "America/New_York"}}, f)
+
+        local = LocalProvider(market_dir)
+        bars = local.bars("AAPL", "max", "1h")
+        assert str(bars.index.tz) == "America/New_York"
+        assert list(bars.index) == list(index)
+
+        replay_dir = str(tmp_path / "replay")
+        recorded = RecordingProvider(local, replay_dir).bars("AAPL", "max", "1h")
+        replayed = ReplayProvider(replay_dir).bars("AAPL", "max", "1h")
+        pd.testing.assert_frame_equal(replayed, recorded, check_freq=False)
+        assert str(replayed.index.tz) == "America/New_York"
+
+    def test_offsets_without_zone_read_as_utc(self, market_dir):
+        index = pd.date_range("2024-03-08 14:30", periods=100, freq="1h", tz="America/New_York", name="Date")
+        pd.DataFrame({c: 1.0 for c in OHLCV_COLUMNS}, index=index).to_csv(f"{market_dir}/MSFT.1h.csv")
+        bars = LocalProvider(market_dir).bars("MSFT", "max", "1h")  # snapshot info has no zone
+        assert str(bars.index.tz) == "UTC"
+        assert (bars.index == index).all()
+
+    def test_missing_recording_is_empty(self, tmp_path):
+        replay = ReplayProvider(str(tmp_path))
+        assert replay.bars("AAPL").empty
+        assert replay.info("AAPL") == {}
+
+
+# ---------------------------------------------------------------------------
+# Provider selection
+# ---------------------------------------------------------------------------
+class TestProviderSelection:
+    def test_env_selects_local(self, monkeypatch, market_dir):
+        monkeypatch.setenv("MARKET_DATA_PROVIDER", "local")
+        monkeypatch.setenv("MARKET_DATA_DIR", market_dir)
+        set_provider(None)
+        try:
+            provider = get_provider()
+            assert isinstance(provider, LocalProvider)
+            assert provider.directory == market_dir
+        finally:
+            set_provider(None)
+
+    def test_unknown_name_raises(self):
+        with pytest.raises(ValueError):
+            _build_provider("bloomberg")
@@ -0,0 +1,278 @@
+"""Tests for the upstream rate limiter, circuit breaker and stale-while-revalidate cache."""
+
+import time
+
+import pytest
+
+import app.providers.guarded as guarded
+from app.providers import set_provider
+from app.providers.base import InvalidRequest
+from app.resilience import (
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamUnavailable,
+    background_scope,
+    note_stale,
+    staleness_scope,
+)
+from tests.conftest import CountingProvider
+
+
+# ---------------------------------------------------------------------------
+# TokenBucket
+# ---------------------------------------------------------------------------
+class TestTokenBucket:
+    def test_allows_burst_then_limits(self):
+        bucket = TokenBucket(rate=1, capacity=3)
+        assert [bucket.try_acquire() == 0.0 for _ in range(4)] == [True, True, True, False]
+
+    def test_acquire_waits_for_refill(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        assert bucket.acquire(timeout=0.1)
+        assert bucket.acquire(timeout=0.1)
+
+    def test_acquire_gives_up_at_timeout(self):
+        bucket = TokenBucket(rate=0.1, capacity=1)
+        bucket.acquire(timeout=0)
+        start = time.monotonic()
+        assert bucket.acquire(timeout=0.05) is False
+        assert time.monotonic() - start < 0.05
+
+    def test_reserve_left_for_other_callers(self):
+        bucket = TokenBucket(rate=0.1, capacity=3)
+        assert bucket.try_acquire(reserve=2) == 0.0
+        assert bucket.try_acquire(reserve=2) > 0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+
+
+# ---------------------------------------------------------------------------
+# CircuitBreaker
+# ---------------------------------------------------------------------------
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert breaker.retry_after() > 0
+
+    def test_success_resets_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_release_frees_trial_without_closing(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+
+
+# ---------------------------------------------------------------------------
+# GuardedProvider
+# ---------------------------------------------------------------------------
+class TestGuardedProvider:
+    def test_fresh_entries_skip_upstream(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bars("AAPL")
+        provider.bars("aapl")
+        assert inner.calls == 1
+
+    def test_cached_frames_not_mutated_by_callers(self, market_dir, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        frame = provider.bars("AAPL")
+        frame["SMA_20"] = 1.0
+        assert "SMA_20" not in provider.bars("AAPL").columns
+
+    def test_lru_eviction_keeps_within_byte_budget(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        one = provider.series("AAPL").nbytes
+        provider.cache_bytes = 2 * one
+        provider.bars("AAPL")
+        provider.bars("MSFT")
+        provider.bars("AAPL")  # touch: MSFT is now least recently used
+        provider.bars("SPY")
+        usage = provider.cache_usage()
+        assert usage["bytes"] <= 2 * one
+        assert usage["evictions"] == 1
+        provider.bars("AAPL")
+        assert inner.calls == 3
+        provider.bars("MSFT")
+        assert inner.calls == 4
+
+    def test_failure_without_cache_raises(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.failing = True
+        with pytest.raises(UpstreamUnavailable):
+            guarded_provider(inner).bars("AAPL")
+
+    def test_open_breaker_fails_fast(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.failing = True
+        provider = guarded_provider(inner, failures=2)
+        for _ in range(2):
+            with pytest.raises(UpstreamUnavailable):
+                provider.bars("AAPL")
+        with pytest.raises(UpstreamUnavailable) as exc_info:
+            provider.bars("AAPL")
+        assert inner.calls == 2  # third call never reached the upstream
+        assert exc_info.value.retry_after > 0
+
+    def test_invalid_request_never_opens_breaker(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.error = InvalidRequest("Period 'bogus' is invalid")
+        provider = guarded_provider(inner, failures=2)
+        for _ in range(5):
+            with pytest.raises(InvalidRequest):
+                provider.bars("AAPL")
+        assert provider.breaker.state == CircuitBreaker.CLOSED
+        inner.error = None
+        assert not provider.bars("MSFT").empty
+
+    def test_non_transient_error_does_not_count(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.error = KeyError("chart")
+        provider = guarded_provider(inner, failures=1)
+        for _ in range(3):
+            with pytest.raises(UpstreamUnavailable):
+                provider.bars("AAPL")
+        assert provider.breaker.state == CircuitBreaker.CLOSED
+
+    def test_yfinance_error_classification(self):
+        pytest.importorskip("yfinance")
+        from yfinance.exceptions import YFRateLimitError
+
+        from app.providers.yfinance_provider import YFinanceProvider
+
+        provider = YFinanceProvider()
+        assert provider.is_transient(YFRateLimitError())
+        assert provider.is_transient(TimeoutError())
+        assert not provider.is_transient(KeyError("chart"))
+        with pytest.raises(InvalidRequest):
+            provider.bars("AAPL", period="bogus")  # rejected before any network call
+
+    def test_rate_limit_raises(self, market_dir, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir), rate=0.01)
+        provider.bucket.acquire(timeout=0)
+        with pytest.raises(UpstreamUnavailable):
+            provider.bars("MSFT")
+
+    def test_background_calls_only_use_spare_capacity(self, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bucket = TokenBucket(rate=0.01, capacity=3)
+        provider.bars("AAPL")  # a user request: the bucket is no longer full
+        with background_scope(0.05):
+            with pytest.raises(UpstreamUnavailable):
+                provider.bars("MSFT")
+        assert not provider.bars("SPY").empty  # users still have the burst
+        assert inner.calls == 2
+
+    def test_background_calls_run_when_idle(self, market_dir, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        provider.bucket = TokenBucket(rate=0.01, capacity=3)
+        with background_scope(0.05):
+            assert not provider.bars("MSFT").empty
+
+    def test_expired_entry_served_stale_and_refreshed(self, market_dir, monkeypatch, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        provider.bars("AAPL")
+        monkeypatch.setitem(guarded.FRESH_TTL, "bars", 0)
+        with staleness_scope() as stale:
+            assert not provider.bars("AAPL").empty
+        assert len(stale) == 1
+        provider._executor.shutdown(wait=True)
+        assert inner.calls == 2
+
+    def test_last_good_served_while_upstream_down(self, market_dir, monkeypatch, guarded_provider):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner, failures=1)
+        provider.bars("AAPL")
+        inner.failing = True
+        monkeypatch.setitem(guarded.FRESH_TTL, "bars", 0)
+        for _ in range(3):
+            with staleness_scope() as stale:
+                assert not provider.bars("AAPL").empty
+            assert stale
+        provider._executor.shutdown(wait=True)
+        assert provider.breaker.state == CircuitBreaker.OPEN
+        assert inner.calls == 2  # one failed refresh, then the breaker held
+
+
+# ---------------------------------------------------------------------------
+# Route behaviour
+# ---------------------------------------------------------------------------
+class TestRoutes:
+    def test_upstream_down_returns_503_not_404(self, test_client, auth_headers, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.failing = True
+        set_provider(guarded_provider(inner))
+        try:
+            resp = test_client.get("/api/stock/AAPL", headers=auth_headers)
+        finally:
+            set_provider(None)
+        assert resp.status_code == 503
+        assert "Retry-After" in resp.headers
+
+    @pytest.mark.parametrize("query", ["period=bogus", "interval=7m", "period=1y&interval=bogus"])
+    def test_bad_period_or_interval_is_400(self, test_client, auth_headers, market_dir, guarded_provider, query):
+        inner = CountingProvider(market_dir)
+        set_provider(guarded_provider(inner, failures=1))
+        try:
+            resp = test_client.get(f"/api/stock/AAPL?{query}", headers=auth_headers)
+            ok = test_client.get("/api/stock/MSFT", headers=auth_headers)
+        finally:
+            set_provider(None)
+        assert resp.status_code == 400
+        assert ok.status_code == 200
+        assert inner.requests == [("MSFT", "1y", "1d")]
+
+    def test_upstream_rejection_is_400(self, test_client, auth_headers, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        inner.error = InvalidRequest("1m data not available for this period")
+        set_provider(guarded_provider(inner, failures=1))
+        try:
+            resp = test_client.get("/api/stock/AAPL?period=1y&interval=1m", headers=auth_headers)
+        finally:
+            set_provider(None)
+        assert resp.status_code == 400
+        assert "1m data" in resp.json()["detail"]
+
+    def test_stale_response_has_header(self, test_client, auth_headers, market_dir, monkeypatch, guarded_provider):
+        provider = guarded_provider(CountingProvider(market_dir))
+        set_provider(provider)
+        try:
+            fresh = test_client.get("/api/stock/AAPL?period=1mo", headers=auth_headers)
+            monkeypatch.setitem(guarded.FRESH_TTL, "bars", 0)
+            stale = test_client.get("/api/stock/AAPL?period=1mo", headers=auth_headers)
+        finally:
+            set_provider(None)
+        assert "X-Data-Stale" not in fresh.headers
+        assert stale.status_code == 200
+        assert stale.headers["X-Data-Stale"] == "true"
+        assert stale.json() == fresh.json()
+
+    def test_note_stale_outside_scope_is_noop(self):
+        note_stale(5.0)
@@ -0,0 +1,141 @@
+"""Tests for the vectorized correlation / covariance / portfolio risk endpoint."""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.providers.guarded as guarded
+import app.risk_utils as risk_utils
+from app import bar_cache
+from app.providers import set_provider
+from app.risk_utils import compute_risk, min_variance_weights, rolling_beta
+from tests.conftest import CountingProvider
+
+
+@pytest.fixture()
+def returns():
+    rng = np.random.default_rng(11)
+    market = rng.normal(0, 0.01, 300)
+    idx = pd.bdate_range("2023-01-02", periods=300)
+    return pd.DataFrame(
+        {
+            "AAA": 1.5 * market + rng.normal(0, 0.005, 300),
+            "BBB": 0.5 * market + rng.normal(0, 0.005, 300),
+            "CCC": rng.normal(0, 0.02, 300),
+        },
+        index=idx,
+    ), pd.Series(market, index=idx, name="SPY")
+
+
+@pytest.fixture(autouse=True)
+def _clear_panels():
+    risk_utils._panels.clear()
+    yield
+    risk_utils._panels.clear()
+
+
+class TestStatistics:
+    def test_matrices_match_pandas(self, returns):
+        panel, _ = returns
+        result = compute_risk(panel)
+        np.testing.assert_allclose(result["covariance"], panel.cov().to_numpy() * 252, atol=1e-6)
+        np.testing.assert_allclose(result["correlation"], panel.corr().to_numpy(), atol=1e-4)
+
+    def test_portfolio_volatility(self, returns):
+        panel, _ = returns
+        weights = {"AAA": 0.5, "BBB": 0.3, "CCC": 0.2}
+        result = compute_risk(panel, weights=weights)
+        expected = (panel @ pd.Series(weights)).std() * np.sqrt(252)
+        assert result["portfolio"]["volatility"] == pytest.approx(expected, rel=1e-4)
+
+    def test_rolling_beta_matches_ols(self, returns):
+        panel, market = returns
+        betas = rolling_beta(panel.to_numpy(), market.to_numpy(), 60)
+        assert betas.shape == (241, 3)
+        window = slice(100, 160)
+        x, y = market.to_numpy()[window], panel["AAA"].to_numpy()[window]
+        assert betas[100, 0] == pytest.approx(np.polyfit(x, y, 1)[0], rel=1e-8)
+
+    def test_betas_reported(self, returns):
+        panel, market = returns
+        result = compute_risk(panel, benchmark=market, window=60)
+        assert result["benchmark"] == "SPY"
+        assert 1.1 < result["beta"]["AAA"] < 1.9
+        assert 0.2 < result["beta"]["BBB"] < 0.8
+        assert len(result["rollingBeta"]["dates"]) == len(result["rollingBeta"]["portfolio"]) == 241
+
+    def test_min_variance_beats_equal_weight(self, returns):
+        panel, _ = returns
+        result = compute_risk(panel)
+        assert sum(result["minVariance"]["weights"].values()) == pytest.approx(1.0)
+        assert result["minVariance"]["volatility"] < result["portfolio"]["volatility"]
+
+    def test_min_variance_solvable_with_more_assets_than_observations(self):
+        rng = np.random.default_rng(0)
+        panel = rng.normal(0, 0.01, (50, 120))
+        cov = np.cov(panel, rowvar=False)
+        weights = min_variance_weights(cov)
+        assert np.isfinite(weights).all()
+        assert weights.sum() == pytest.approx(1.0)
+
+    def test_500_ticker_panel_is_fast(self):
+        rng = np.random.default_rng(1)
+        panel = pd.DataFrame(
+            rng.normal(0, 0.01, (252, 500)),
+            columns=[f"T{i}" for i in range(500)],
+            index=pd.bdate_range("2023-01-02", periods=252),
+        )
+        market = pd.Series(rng.normal(0, 0.01, 252), index=panel.index, name="SPY")
+        started = time.perf_counter()
+        result = compute_risk(panel, benchmark=market)
+        assert time.perf_counter() - started < 1.0
+        assert len(result["correlation"]) == 500
+
+
+class TestRiskEndpoint:
+    def test_endpoint(self, test_client, auth_headers, local_provider):
+        resp = test_client.get(
+            "/api/stock/risk?tickers=AAPL,MSFT,NOPE&weights=0.7,0.3,0&benchmark=SPY&window=20",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["tickers"] == ["AAPL", "MSFT"]
+        assert body["dropped"] == ["NOPE"]
+        assert body["portfolio"]["weights"] == {"AAPL": 0.7, "MSFT": 0.3}
+        assert set(body["beta"]) == {"AAPL", "MSFT"}
+        assert len(body["correlation"]) == 2
+
+    def test_weight_count_mismatch(self, test_client, auth_headers, local_provider):
+        resp = test_client.get("/api/stock/risk?tickers=AAPL,MSFT&weights=1", headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_stale_bars_flagged_and_deadline_applied(
+        self, test_client, auth_headers, market_dir, monkeypatch, guarded_provider
+    ):
+        inner = CountingProvider(market_dir)
+        provider = guarded_provider(inner)
+        set_provider(provider)
+        bar_cache.forget()
+        monkeypatch.setattr(risk_utils, "_panels", risk_utils.OrderedDict())
+        try:
+            url = "/api/stock/risk?tickers=AAPL,MSFT&benchmark=SPY&window=20"
+            headers = {**auth_headers, "X-Request-Deadline": "5000"}
+            fresh = test_client.get(url, headers=headers)
+            assert 0 < inner.seen_deadline <= 5
+            risk_utils._panels.clear()
+            monkeypatch.setitem(guarded.FRESH_TTL, "bars", 0)
+            stale = test_client.get(url, headers=headers)
+            provider._executor.shutdown(wait=True)
+        finally:
+            set_provider(None)
+            bar_cache.forget()
+        assert "X-Data-Stale" not in fresh.headers
+        assert stale.status_code == 200
+        assert stale.headers["X-Data-Stale"] == "true"
+
+    def test_no_data(self, test_client, auth_headers, local_provider):
+        resp = test_client.get("/api/stock/risk?tickers=NOPE", headers=auth_headers)
+        assert resp.status_code == 404
@@ -0,0 +1,145 @@
+"""Tests for the fundamentals screener index and endpoint."""
+
+import pytest
+
+import app.screener as screener
+from app.screener import ScreenerIndex, flatten_info, parse_filter
+
+ROWS = {
+    "AAA": {"trailingPE": 10.0, "marketCap": 300, "sector": "Technology", "dividendYield": None},
+    "BBB": {"trailingPE": 25.0, "marketCap": 100, "sector": "Energy", "dividendYield": 0.03},
+    "CCC": {"trailingPE": None, "marketCap": 200, "sector": "technology", "dividendYield": 0.01},
+    "DDD": {"trailingPE": 15.0, "marketCap": 400, "sector": None, "dividendYield": 0.02},
+}
+
+
+def _symbols(result):
+    return [row["symbol"] for row in result["results"]]
+
+
+class TestParseFilter:
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            ("trailingPE<20", ("trailingPE", "<", "20")),
+            ("marketCap>=1e9", ("marketCap", ">=", "1e9")),
+            ("sector==Technology", ("sector", "==", "Technology")),
+            ("sector != Energy", ("sector", "!=", "Energy")),
+        ],
+    )
+    def test_valid(self, expression, expected):
+        assert parse_filter(expression) == expected
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_filter("trailingPE")
+
+
+class TestScreenerIndex:
+    def test_columns_split_by_type(self):
+        index = ScreenerIndex(ROWS)
+        assert set(index.numeric) == {"trailingPE", "marketCap", "dividendYield"}
+        assert set(index.text) == {"sector"}
+
+    def test_numeric_range_filters(self):
+        index = ScreenerIndex(ROWS)
+        assert _symbols(index.query([("trailingPE", "<", "20")])) == ["AAA", "DDD"]
+        assert _symbols(index.query([("trailingPE", "<=", "15")])) == ["AAA", "DDD"]
+        assert _symbols(index.query([("trailingPE", ">", "15")])) == ["BBB"]
+        assert _symbols(index.query([("trailingPE", "!=", "15")])) == ["AAA", "BBB"]
+
+    def test_text_filter_case_insensitive(self):
+        index = ScreenerIndex(ROWS)
+        assert _symbols(index.query([("sector", "==", "TECHNOLOGY")])) == ["AAA", "CCC"]
+        assert _symbols(index.query([("sector", "!=", "technology")])) == ["BBB"]
+
+    def test_combined_filters(self):
+        index = ScreenerIndex(ROWS)
+        result = index.query([("sector", "==", "technology"), ("marketCap", ">", "250")])
+        assert _symbols(result) == ["AAA"]
+
+    def test_sort_puts_missing_last(self):
+        index = ScreenerIndex(ROWS)
+        assert _symbols(index.query([], sort="trailingPE")) == ["AAA", "DDD", "BBB", "CCC"]
+        assert _symbols(index.query([], sort="trailingPE", descending=True)) == ["BBB", "DDD", "AAA", "CCC"]
+
+    def test_pagination_and_projection(self):
+        index = ScreenerIndex(ROWS)
+        result = index.query([], sort="marketCap", descending=True, offset=1, limit=2, fields=["marketCap"])
+        assert result["total"] == 4
+        assert result["results"] == [
+            {"symbol": "AAA", "marketCap": 300.0},
+            {"symbol": "CCC", "marketCap": 200.0},
+        ]
+
+    def test_missing_values_serialised_as_none(self):
+        index = ScreenerIndex(ROWS)
+        result = index.query([("trailingPE", "==", "10")], fields=["dividendYield", "sector"])
+        assert result["results"] == [{"symbol": "AAA", "dividendYield": None, "sector": "Technology"}]
+
+    def test_unknown_fields_rejected(self):
+        index = ScreenerIndex(ROWS)
+        with pytest.raises(ValueError):
+            index.query([("nope", "<", "1")])
+        with pytest.raises(ValueError):
+            index.query([], sort="nope")
+        with pytest.raises(ValueError):
+            index.query([("sector", "<", "x")])
+
+
+class TestRefresh:
+    def test_flatten_info_names(self, local_provider):
+        from app.stock_utils import fetch_ticker_info
+
+        row = flatten_info(fetch_ticker_info("AAPL"))
+        assert row["trailingPE"] == 20.0
+        assert row["sector"] == "Technology"
+        assert row["priceTargets.mean"] == 120
+        assert row["recommendations.buy"] == 10
+
+    def test_refresh_builds_index(self, local_provider, monkeypatch):
+        monkeypatch.setattr(screener, "_index", None)
+        monkeypatch.setattr(screener, "_rows", {})
+        index = screener.refresh(["AAPL", "MSFT", "SPY", "NOPE"])
+        assert list(index.symbols) == ["AAPL", "MSFT", "SPY"]
+        assert screener.get_index() is index
+
+    def test_refresh_leaves_user_burst(self, market_dir, monkeypatch, guarded_provider):
+        from app.providers import set_provider
+        from app.resilience import TokenBucket
+        from tests.conftest import CountingProvider
+
+        provider = guarded_provider(CountingProvider(market_dir))
+        provider.bucket = TokenBucket(rate=0.01, capacity=4)
+        monkeypatch.setattr(screener, "SCREENER_MAX_WAIT", 0.05)
+        monkeypatch.setattr(screener, "_index", None)
+        monkeypatch.setattr(screener, "_rows", {"AAPL": {"trailingPE": 1.0}})
+        set_provider(provider)
+        try:
+            provider.bucket.acquire(timeout=0)  # recent user traffic
+            index = screener.refresh(["AAPL"])
+            assert provider.bucket.acquire(timeout=0)  # the rest is still there
+        finally:
+            set_provider(None)
+        assert list(index.symbols) == ["AAPL"]  # previous row kept
+
+    def test_endpoint(self, test_client, auth_headers, local_provider, monkeypatch):
+        monkeypatch.setattr(screener, "_rows", {})
+        monkeypatch.setattr(screener, "_index", None)
+        assert test_client.get("/api/stock/screener", headers=auth_headers).status_code == 503
+
+        screener.refresh(["AAPL", "MSFT", "SPY"])
+        resp = test_client.get(
+            "/api/stock/screener?filter=trailingPE>20.5&sort=-marketCap&fields=trailingPE,marketCap",
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["total"] == 2
+        assert [r["symbol"] for r in body["results"]] == ["SPY", "MSFT"]
+        assert set(body["results"][0]) == {"symbol", "trailingPE", "marketCap"}
+
+        bad = test_client.get("/api/stock/screener?filter=bogus<1", headers=auth_headers)
+        assert bad.status_code == 400
+        fields = test_client.get("/api/stock/screener/fields", headers=auth_headers).json()
+        assert "returnOnEquity" in fields["numeric"]
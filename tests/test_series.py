@@ -0,0 +1,99 @@
+"""Tests for the compact array-backed PriceSeries."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.providers.base import slice_period
+from app.providers.series import PriceSeries
+
+
+def _frame(index, start=100.0):
+    close = start + np.arange(len(index), dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": close - 0.5,
+            "High": close + 1.25,
+            "Low": close - 1.0,
+            "Close": close,
+            "Volume": np.arange(len(index)) * 1000 + 1,
+        },
+        index=pd.DatetimeIndex(index, name="Date"),
+    )
+
+
+DAILY = _frame(pd.bdate_range("2023-01-02", "2024-06-28"))
+INTRADAY = _frame(pd.date_range("2024-03-07 09:30", "2024-03-12 16:00", freq="30min", tz="America/New_York"))
+
+
+# ---------------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------------
+class TestLayout:
+    def test_dtypes(self):
+        series = PriceSeries.from_frame(DAILY)
+        assert series.timestamps.dtype == np.int64
+        assert series.close.dtype == np.float32
+        assert series.volume.dtype == np.uint64
+        assert series.nbytes == len(DAILY) * 32
+
+    def test_high_prices_keep_float64(self):
+        series = PriceSeries.from_frame(_frame(DAILY.index, start=600_000.0))
+        assert series.close.dtype == np.float64
+
+    def test_frame_round_trip(self):
+        frame = PriceSeries.from_frame(DAILY).to_frame()
+        pd.testing.assert_frame_equal(frame, DAILY, check_dtype=False, check_index_type=False, check_freq=False)
+
+    def test_tz_aware_round_trip(self):
+        frame = PriceSeries.from_frame(INTRADAY).to_frame()
+        assert str(frame.index.tz) == "America/New_York"
+        assert frame.index.equals(INTRADAY.index)
+
+    def test_empty(self):
+        series = PriceSeries.from_frame(DAILY.iloc[:0])
+        assert series.empty
+        assert series.to_frame().empty
+        assert series.to_records((20,)) == []
+
+
+# ---------------------------------------------------------------------------
+# Slicing
+# ---------------------------------------------------------------------------
+class TestSlicePeriod:
+    @pytest.mark.parametrize("period", ["5d", "1mo", "6mo", "ytd", "1y", "max"])
+    def test_matches_frame_slicing(self, period):
+        for frame in (DAILY, INTRADAY):
+            sliced = PriceSeries.from_frame(frame).slice_period(period)
+            assert sliced.index().equals(slice_period(frame, period).index)
+
+    def test_slices_are_views(self):
+        series = PriceSeries.from_frame(DAILY)
+        sliced = series.slice_period("1mo")
+        assert np.shares_memory(sliced.close, series.close)
+        assert np.shares_memory(sliced.timestamps, series.timestamps)
+
+    def test_unknown_period_raises(self):
+        with pytest.raises(ValueError):
+            PriceSeries.from_frame(DAILY).slice_period("3w")
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+class TestToRecords:
+    def test_matches_row_by_row_conversion(self):
+        records = PriceSeries.from_frame(DAILY).to_records((20, 50))
+        sma = DAILY["Close"].rolling(20).mean()
+        row = records[30]
+        assert list(row) == ["Date", "Open", "High", "Low", "Close", "Volume", "SMA_20", "SMA_50"]
+        assert row["Date"] == DAILY.index[30].isoformat()
+        assert row["High"] == round(float(DAILY["High"].iloc[30]), 2)
+        assert row["Volume"] == int(DAILY["Volume"].iloc[30])
+        assert row["SMA_20"] == round(float(sma.iloc[30]), 2)
+        assert row["SMA_50"] is None
+
+    def test_tz_aware_dates_carry_offset(self):
+        records = PriceSeries.from_frame(INTRADAY).to_records()
+        # Crosses the 2024-03-10 DST change
+        assert [r["Date"] for r in records] == [ts.isoformat() for ts in INTRADAY.index]
@@ -0,0 +1,145 @@
+"""Tests for the cross-worker shared store and what is built on it."""
+
+import json
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from app import claude_insights, screener, shared_store
+from app.providers.series import PriceSeries
+from tests.conftest import CountingProvider
+
+
+def _take_tokens(path, attempts, results):
+    import os
+
+    os.environ["SHARED_STORE_PATH"] = path
+    bucket = shared_store.SharedTokenBucket("upstream", rate=0.001, capacity=5)
+    results.put(sum(bucket.try_acquire() == 0 for _ in range(attempts)))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = str(tmp_path / "shared.db")
+    monkeypatch.setenv("SHARED_STORE_PATH", path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Key-value store and leases
+# ---------------------------------------------------------------------------
+class TestStore:
+    def test_disabled_without_path(self, monkeypatch):
+        monkeypatch.delenv("SHARED_STORE_PATH", raising=False)
+        assert not shared_store.enabled()
+
+    def test_put_get_round_trip(self, store):
+        assert shared_store.get("k") is None
+        shared_store.put("k", b"one", updated=100.0)
+        shared_store.put("k", b"two", updated=200.0)
+        assert shared_store.get("k") == (200.0, b"two")
+
+    def test_lease_is_exclusive_until_released(self, store):
+        assert shared_store.acquire_lease("job", 60, owner="a")
+        assert not shared_store.acquire_lease("job", 60, owner="b")
+        assert shared_store.acquire_lease("job", 60, owner="a")  # renewal
+        shared_store.release_lease("job", owner="a")
+        assert shared_store.acquire_lease("job", 60, owner="b")
+
+    def test_expired_lease_moves(self, store):
+        assert shared_store.acquire_lease("job", 0.01, owner="a")
+        time.sleep(0.02)
+        assert shared_store.acquire_lease("job", 60, owner="b")
+
+
+# ---------------------------------------------------------------------------
+# SharedTokenBucket
+# ---------------------------------------------------------------------------
+class TestSharedTokenBucket:
+    def test_instances_share_tokens(self, store):
+        first = shared_store.SharedTokenBucket("upstream", rate=0.001, capacity=3)
+        second = shared_store.SharedTokenBucket("upstream", rate=0.001, capacity=3)
+        assert [first.try_acquire(), second.try_acquire(), first.try_acquire()] == [0, 0, 0]
+        assert second.try_acquire() > 0
+
+    def test_limit_holds_across_processes(self, store):
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_take_tokens, args=(store, 5, results)) for _ in range(3)]
+        for proc in procs:
+            proc.start()
+        granted = sum(results.get(timeout=10) for _ in procs)
+        for proc in procs:
+            proc.join(timeout=10)
+        assert granted == 5
+
+
+# ---------------------------------------------------------------------------
+# GuardedProvider second-level cache
+# ---------------------------------------------------------------------------
+class TestSharedProviderCache:
+    def test_series_bytes_round_trip(self, local_provider):
+        series = local_provider.series("AAPL")
+        restored = PriceSeries.from_bytes(series.to_bytes())
+        assert restored.close.dtype == series.close.dtype
+        np.testing.assert_array_equal(restored.timestamps, series.timestamps)
+        np.testing.assert_array_equal(restored.close, series.close)
+        assert restored.index().equals(series.index())
+
+    def test_second_worker_adopts_without_upstream_call(self, store, market_dir, guarded_provider):
+        inner_a, inner_b = CountingProvider(market_dir), CountingProvider(market_dir)
+        frame = guarded_provider(inner_a, shared=True).bars("AAPL")
+        info = guarded_provider(inner_a, shared=True).info("AAPL")
+        worker_b = guarded_provider(inner_b, shared=True)
+        assert worker_b.bars("AAPL").equals(frame)
+        assert worker_b.info("AAPL") == info
+        assert inner_b.calls == 0
+
+    def test_refresh_adopts_newer_shared_copy(self, store, market_dir, guarded_provider):
+        inner_a, inner_b = CountingProvider(market_dir), CountingProvider(market_dir)
+        worker_a, worker_b = guarded_provider(inner_a, shared=True), guarded_provider(inner_b, shared=True)
+        worker_a.bars("AAPL")
+        key = ("bars", "AAPL", "1y", "1d")
+        # Our copy is old; another worker has just refreshed it
+        worker_a._store(key, worker_a._entries[key][1], time.monotonic() - 10_000)
+        worker_b.bars("AAPL")
+        worker_a._fetch(key, None)
+        assert inner_a.calls == 1
+        assert time.monotonic() - worker_a._entries[key][0] < 60
+
+    def test_unshared_provider_ignores_store(self, store, market_dir, guarded_provider):
+        inner = CountingProvider(market_dir)
+        guarded_provider(inner, shared=True).bars("AAPL")
+        guarded_provider(inner).bars("AAPL")
+        assert inner.calls == 2
+
+
+# ---------------------------------------------------------------------------
+# Insights and screener
+# ---------------------------------------------------------------------------
+class TestSharedInsights:
+    def test_entry_from_other_worker_is_served(self, store, monkeypatch):
+        monkeypatch.setenv("CLAUDE_API_KEY", "test-key")
+        monkeypatch.setattr(claude_insights, "_cache", {})
+        shared_store.put("insights:AAPL", json.dumps({"ttl": 3600, "insights": {"overallScore": 64}}).encode())
+        monkeypatch.setattr(claude_insights, "get_client", lambda _key: pytest.fail("model called"))
+        assert claude_insights.get_insights({}, "AAPL") == {"overallScore": 64}
+
+    def test_saved_insights_are_published(self, store, monkeypatch):
+        monkeypatch.setattr(claude_insights, "_cache", {})
+        claude_insights.store("MSFT", {"overallScore": 51}, ttl=600)
+        assert json.loads(shared_store.get("insights:MSFT")[1]) == {"ttl": 600, "insights": {"overallScore": 51}}
+
+
+class TestSharedScreener:
+    def test_load_shared_swaps_in_newer_rows(self, store, monkeypatch):
+        monkeypatch.setattr(screener, "_rows", {})
+        monkeypatch.setattr(screener, "_index", screener.ScreenerIndex({"AAPL": {"trailingPE": 30.0}}, built_at=100.0))
+        rows = {"MSFT": {"trailingPE": 35.0}, "KO": {"trailingPE": 24.0}}
+        shared_store.put(screener.SHARED_ROWS_KEY, json.dumps(rows).encode(), updated=200.0)
+        index = screener.load_shared()
+        assert index is screener.get_index()
+        assert list(index.symbols) == ["KO", "MSFT"]
+        assert screener.load_shared() is None  # nothing newer
@@ -0,0 +1,80 @@
+"""Tests for cold-start behaviour: lazy imports, warm-up and readiness."""
+
+import os
+import subprocess
+import sys
+
+from app import warmup
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+LAZY_MODULES = ("statsmodels", "yfinance", "anthropic")
+# Cumulative `import app.main` budget; override on slow machines
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Run ``python -X importtime -c 'import <module>'`` in a clean interpreter
+    and return cumulative microseconds per imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+# ---------------------------------------------------------------------------
+# Import-time budget
+# ---------------------------------------------------------------------------
+class TestImportTime:
+    def test_heavy_modules_not_imported_at_startup(self):
+        timings = _importtime("app.main")
+        for module in LAZY_MODULES:
+            assert module not in timings, f"{module} imported eagerly by app.main"
+
+    def test_app_import_within_budget(self):
+        timings = _importtime("app.main")
+        elapsed_ms = timings["app.main"] / 1000
+        assert elapsed_ms < IMPORT_TIME_BUDGET_MS, (
+            f"import app.main took {elapsed_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS}ms)"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Warm-up and readiness
+# ---------------------------------------------------------------------------
+class TestWarmUp:
+    def test_disabled_marks_ready_immediately(self, monkeypatch):
+        monkeypatch.delenv("WARMUP_ON_STARTUP", raising=False)
+        assert warmup.start_warm_up() is None
+        assert warmup.is_ready()
+
+    def test_enabled_runs_in_background(self, monkeypatch, local_provider):
+        monkeypatch.setenv("WARMUP_ON_STARTUP", "1")
+        monkeypatch.delenv("CLAUDE_API_KEY", raising=False)
+        thread = warmup.start_warm_up()
+        assert thread is not None
+        thread.join(timeout=60)
+        state = warmup.readiness()
+        assert state["ready"] is True
+        assert state["error"] is None
+        assert state["finished"] >= state["started"]
+
+    def test_ready_endpoint_reports_warming(self, test_client, monkeypatch):
+        monkeypatch.setattr(warmup, "is_ready", lambda: False)
+        resp = test_client.get("/api/ready")
+        assert resp.status_code == 503
+        assert resp.json()["status"] == "warming"
+
+    def test_ready_and_health_are_separate(self, test_client):
+        warmup._ready.set()
+        assert test_client.get("/api/ready").status_code == 200
+        assert test_client.get("/api/health").json() == {"status": "ok"}